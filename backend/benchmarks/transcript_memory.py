@@ -0,0 +1,53 @@
+# backend/benchmarks/transcript_memory.py
+"""강의 1개 로드 시 자막 메모리 사용량 비교 (dict 리스트 vs TranscriptIndex)
+
+실행: cd backend && python -m benchmarks.transcript_memory [분]
+"""
+import random
+import sys
+import tracemalloc
+from transcript_index import TranscriptIndex
+
+WORDS = ['신경망', '활성화', '함수', '역전파', '알고리즘', '은닉층', '뉴런', '학습률',
+         '그래디언트', '손실', 'the', 'model', 'layer', '데이터', '예측', '가중치']
+
+
+def make_segments(minutes):
+    """YouTube 자막과 비슷한 세그먼트 생성 (평균 약 3초, 단어 5~12개)"""
+    segments = []
+    t = 0.0
+    while t < minutes * 60:
+        duration = random.uniform(1.5, 4.5)
+        text = ' '.join(random.choice(WORDS) for _ in range(random.randint(5, 12)))
+        segments.append({'start': round(t, 3), 'end': round(t + duration, 3), 'text': text})
+        t += duration * random.uniform(0.7, 1.0)  # 자동 자막처럼 약간 겹침
+    return segments
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main():
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    random.seed(0)
+    raw = make_segments(minutes)
+
+    # JSON에서 막 읽은 것처럼 매번 새 객체로 측정
+    as_list, list_bytes = measure(lambda: [dict(seg, text=''.join(seg['text'])) for seg in raw])
+    index, index_bytes = measure(lambda: TranscriptIndex(raw))
+
+    assert index.to_list() == as_list
+
+    print(f"📏 {minutes}분 강의, 세그먼트 {len(raw)}개")
+    print(f"  dict 리스트      : {list_bytes / 1024:8.1f} KB ({list_bytes / len(raw):6.1f} B/세그먼트)")
+    print(f"  TranscriptIndex : {index_bytes / 1024:8.1f} KB ({index_bytes / len(raw):6.1f} B/세그먼트)")
+    print(f"  절감            : {(1 - index_bytes / list_bytes) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+# backend/cache_service.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+
+class LRUCache:
+    """메모리 LRU 캐시 (TTL + 개수/용량 기반 제거)"""
+
+    def __init__(self, max_items=256, max_bytes=None, ttl=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=1, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+            # 단일 항목이 전체 용량보다 크면 저장하지 않음
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.max_items or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'items': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+
+class DiskCache:
+    """SQLite 디스크 캐시 (TTL + 용량 기반 제거, 프로세스 간 공유)"""
+
+    def __init__(self, path, max_bytes=None, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed ON entries(accessed_at)')
+        self._conn.commit()
+
+    def get(self, key):
+        """JSON 문자열 반환 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            payload, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return payload
+
+    def set(self, key, payload, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        size = len(payload.encode('utf-8'))
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, payload, size, expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def _evict(self, now):
+        """만료 항목 삭제 후 용량 초과 시 오래 안 쓴 항목부터 삭제"""
+        self._conn.execute('DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?', (now,))
+        if self.max_bytes is None:
+            return
+
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute('SELECT key, size FROM entries ORDER BY accessed_at').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            items, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'items': items,
+                'bytes': total,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class TieredCache:
+    """메모리 LRU + 디스크(SQLite) 2단계 캐시
+
+    값은 JSON 직렬화 가능해야 하며, encode/decode를 지정하면 메모리에는
+    decode된 객체를, 디스크에는 encode된 JSON을 저장
+    """
+
+    def __init__(self, name, ttl=None, memory_items=256, memory_bytes=None, disk_bytes=None,
+                 encode=None, decode=None, disk=True):
+        self.name = name
+        self.encode = encode
+        self.decode = decode
+        self.memory = LRUCache(max_items=memory_items, max_bytes=memory_bytes, ttl=ttl)
+        self.disk = None
+        if disk and Config.CACHE_DISK_ENABLED:
+            path = os.path.join(Config.CACHE_DIR, f'{name}.sqlite3')
+            self.disk = DiskCache(path, max_bytes=disk_bytes, ttl=ttl)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if self.disk is None:
+            return None
+
+        try:
+            payload = self.disk.get(key)
+        except sqlite3.Error as e:
+            print(f"❌ 디스크 캐시 조회 실패 ({self.name}): {e}")
+            return None
+
+        if payload is None:
+            return None
+
+        value = json.loads(payload)
+        if self.decode is not None:
+            value = self.decode(value)
+        self.memory.set(key, value, size=len(payload.encode('utf-8')))
+        return value
+
+    def set(self, key, value, ttl=None):
+        data = self.encode(value) if self.encode is not None else value
+        payload = json.dumps(data, ensure_ascii=False)
+        # 메모리 용량은 JSON 글자 수가 아닌 UTF-8 바이트 기준 (한글은 글자당 3바이트)
+        self.memory.set(key, value, size=len(payload.encode('utf-8')), ttl=ttl)
+
+        if self.disk is not None:
+            try:
+                self.disk.set(key, payload, ttl=ttl)
+            except sqlite3.Error as e:
+                print(f"❌ 디스크 캐시 저장 실패 ({self.name}): {e}")
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def stats(self):
+        result = {'memory': self.memory.stats()}
+        if self.disk is not None:
+            result['disk'] = self.disk.stats()
+        return result
+
+
+# 등록된 캐시 목록 (통계 조회용)
+_caches = {}
+
+
+def get_cache(name, **kwargs):
+    """이름별 캐시 생성/조회"""
+    if name not in _caches:
+        _caches[name] = TieredCache(name, **kwargs)
+    return _caches[name]
+
+
+def get_stats():
+    """전체 캐시 통계"""
+    return {name: cache.stats() for name, cache in _caches.items()}
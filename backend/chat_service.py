@@ -1,15 +1,199 @@
 # backend/chat_service.py
-from openai import OpenAI
 from config import Config
+import hashlib
+import re
+import threading
+import time
+import cache_service
+import openai_service
+import retrieval_service
+import task_service
+import token_service
 
-client = OpenAI(api_key=Config.OPENAI_API_KEY)
+summary_flight = task_service.get_single_flight('summarize')
 
+# 자막 해시 → 최종 요약 (같은 영상을 보는 모든 학생이 공유)
+summary_cache = cache_service.get_cache(
+    'summary',
+    ttl=Config.SUMMARY_CACHE_TTL,
+    memory_items=512
+)
+
+# 프롬프트를 바꾸면 올려서 기존 답변 캐시를 무효화
+CHAT_PROMPT_VERSION = 1
+
+CHAT_ERROR_MESSAGE = "죄송합니다. 현재 질문에 답변할 수 없습니다."
+
+# (자막, 정규화된 질문) → 첫 질문 답변 (같은 강의를 듣는 학생들이 공유)
+answer_cache = cache_service.get_cache(
+    'chat_answer',
+    ttl=Config.CHAT_ANSWER_CACHE_TTL,
+    memory_items=Config.CHAT_ANSWER_CACHE_ITEMS,
+    disk=Config.CHAT_ANSWER_CACHE_DISK
+)
+
+# 질문 정규화용 구두점
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+SUMMARY_SYSTEM_PROMPT = "당신은 강의 내용을 핵심 요점 위주로 요약하는 전문가입니다. 한국어로 답변하세요."
+
+history_stats = {'summaries': 0, 'failures': 0, 'dropped': 0}
+
+
+class ConversationMemory:
+    """세션별 대화 기록 (토큰 예산 기반)
+
+    최근 대화는 CHAT_HISTORY_TOKENS 안에서 그대로 유지하고, 예산을 넘은 오래된 대화는
+    요청 경로 밖(백그라운드)에서 누적 요약에 합침. 요약이 반영될 때까지는 원문을 그대로
+    프롬프트에 포함하되 CHAT_PENDING_TOKENS를 넘으면 가장 오래된 것부터 버림.
+    요약이 실패하면 다시 시도하기까지 점점 길게 기다림. 메시지별 토큰 수는 추가 시 1회만 계산
+    """
+
+    def __init__(self, max_tokens=None, max_pending_tokens=None):
+        self.max_tokens = max_tokens or Config.CHAT_HISTORY_TOKENS
+        self.max_pending_tokens = max_pending_tokens or Config.CHAT_PENDING_TOKENS
+        self.summary = ""
+        self._recent = []  # [(message, tokens)]
+        self._tokens = 0
+        self._pending = []  # 요약 대기 중인 오래된 [(message, tokens)] (요약 반영 전까지 프롬프트에 유지)
+        self._pending_tokens = 0
+        self._summarizing = False
+        self._failures = 0  # 연속 요약 실패 횟수
+        self._retry_at = 0.0  # 이 시각(time.monotonic()) 전에는 요약을 다시 시도하지 않음
+        self._lock = threading.Lock()
+
+    def append(self, user_message, assistant_response):
+        """대화 한 턴 추가 후 예산 초과분을 요약 대기열로 이동"""
+        turn = [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": assistant_response}
+        ]
+        counted = [(message, token_service.count_tokens(message['content'])) for message in turn]
+
+        with self._lock:
+            self._recent.extend(counted)
+            self._tokens += sum(tokens for _, tokens in counted)
+
+            # 방금 추가한 턴은 항상 유지
+            while self._tokens > self.max_tokens and len(self._recent) > 2:
+                entry = self._recent.pop(0)
+                self._tokens -= entry[1]
+                self._pending.append(entry)
+                self._pending_tokens += entry[1]
+
+            # 요약이 계속 실패해도 대기열이 끝없이 커지지 않도록 오래된 것부터 버림
+            while self._pending_tokens > self.max_pending_tokens and self._pending:
+                _, tokens = self._pending.pop(0)
+                self._pending_tokens -= tokens
+                history_stats['dropped'] += 1
+
+            start = self._pending and not self._summarizing and time.monotonic() >= self._retry_at
+            if start:
+                self._summarizing = True
+
+        if start:
+            task_service.submit(self._fold_pending, pool='chat_summary')
+
+    def messages(self):
+        """프롬프트용 대화 기록 (누적 요약 + 요약 대기 중인 대화 + 최근 대화)"""
+        with self._lock:
+            history = [message for message, _ in self._pending + self._recent]
+            summary = self.summary
+
+        if summary:
+            history.insert(0, {"role": "system", "content": f"이전 대화 요약:\n{summary}"})
+        return history
+
+    def tokens(self):
+        """최근 대화 토큰 수"""
+        with self._lock:
+            return self._tokens
+
+    def _fold_pending(self):
+        """요약 대기 메시지를 누적 요약에 합침 (처리 중 새로 쌓인 메시지도 이어서 처리)"""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+                summary = self.summary
+                if not pending:
+                    self._summarizing = False
+                    return
+
+            try:
+                summary = summarize_conversation(summary, [message for message, _ in pending])
+                history_stats['summaries'] += 1
+            except Exception as e:
+                print(f"❌ 대화 요약 실패: {e}")
+                history_stats['failures'] += 1
+                with self._lock:
+                    # 대기 메시지는 그대로 두고, 실패가 이어질수록 다음 시도를 늦춤
+                    self._failures += 1
+                    delay = min(Config.CHAT_SUMMARY_RETRY_MAX_DELAY,
+                                Config.CHAT_SUMMARY_RETRY_BASE_DELAY * 2 ** (self._failures - 1))
+                    self._retry_at = time.monotonic() + delay
+                    self._summarizing = False
+                return
+
+            # 요약에 반영된 메시지만 대기열에서 제거 (그 사이 버려진 메시지가 있어도 안전하게)
+            with self._lock:
+                self.summary = summary
+                self._failures = 0
+                self._retry_at = 0.0
+                folded = {id(entry) for entry in pending}
+                self._pending = [entry for entry in self._pending if id(entry) not in folded]
+                self._pending_tokens = sum(tokens for _, tokens in self._pending)
+
+
+def summarize_conversation(previous_summary, messages):
+    """이전 요약 + 오래된 대화 → 새 누적 요약"""
+    dialogue = '\n'.join(
+        f"{'학생' if message['role'] == 'user' else 'AI'}: {message['content']}"
+        for message in messages
+    )
+
+    response = openai_service.chat_completion(
+        'summary',
+        priority='background',
+        model=Config.AI_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "당신은 학생과 AI 튜터의 대화를 간결하게 요약하는 도우미입니다. 한국어로 답변하세요."
+            },
+            {
+                "role": "user",
+                "content": f"""이전 요약과 이어지는 대화를 합쳐 학생이 무엇을 물었고 어떤 설명을 들었는지 핵심만 요약해주세요.
+
+이전 요약:
+{previous_summary or '(없음)'}
+
+이어지는 대화:
+{dialogue}
+
+요약:"""
+            }
+        ],
+        temperature=0.3,
+        max_tokens=Config.CHAT_SUMMARY_TOKENS
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+def create_chat_context(transcript_text, context_chunks=None):
+    """챗봇 시스템 프롬프트 생성 (검색된 청크가 있으면 질문 관련 구간만 사용)"""
+    if context_chunks:
+        lecture_text = '\n\n'.join(
+            f"[{format_time(chunk['start'])}~{format_time(chunk['end'])}] {chunk['text']}"
+            if chunk.get('start') is not None else chunk['text']
+            for chunk in context_chunks
+        )
+    else:
+        lecture_text = transcript_text[:3000]
 
-def create_chat_context(transcript_text):
-    """챗봇 시스템 프롬프트 생성"""
     return f"""당신은 친절한 학습 도우미 AI입니다.
 학생이 시청 중인 강의 내용:
-{transcript_text[:3000]}
+{lecture_text}
 
 위 강의 내용을 바탕으로:
 1. 학생의 질문에 명확하게 답변하세요
@@ -18,21 +202,58 @@ def create_chat_context(transcript_text):
 4. 친근하고 격려하는 톤으로 대화하세요"""
 
 
-def chat(transcript_text, user_message, conversation_history=None):
-    """챗봇 대화"""
-    try:
-        if conversation_history is None:
-            conversation_history = []
+def format_time(seconds):
+    """초 → mm:ss"""
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
 
-        system_prompt = create_chat_context(transcript_text)
 
-        messages = [
-            {"role": "system", "content": system_prompt}
-        ] + conversation_history + [
-            {"role": "user", "content": user_message}
-        ]
+def normalize_question(question):
+    """답변 캐시용 질문 정규화 (대소문자, 구두점, 공백 차이만 무시)
+
+    조사는 떼지 않음 ('정확도' → '정확'처럼 다른 질문이 같은 키가 되는 것을 방지)
+    """
+    return ' '.join(_PUNCTUATION.sub(' ', question.lower()).split())
+
+
+def answer_cache_key(transcript_key, question):
+    """답변 캐시 키 (자막 + 정규화된 질문 + 모델/프롬프트 버전)"""
+    raw = f"{CHAT_PROMPT_VERSION}:{Config.AI_MODEL}:{transcript_key}:{normalize_question(question)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_answer(key):
+    """캐시된 답변 {'response', 'sources'} (없으면 None)"""
+    return answer_cache.get(key)
+
+
+def cache_answer(key, response, sources):
+    """정상 응답만 캐시"""
+    if response and response != CHAT_ERROR_MESSAGE:
+        answer_cache.set(key, {'response': response, 'sources': sources})
+
 
-        response = client.chat.completions.create(
+def build_messages(transcript_text, user_message, conversation_history=None, context_chunks=None):
+    """시스템 프롬프트 + 대화 기록 + 질문으로 메시지 구성"""
+    if conversation_history is None:
+        conversation_history = []
+
+    system_prompt = create_chat_context(transcript_text, context_chunks)
+
+    return [
+        {"role": "system", "content": system_prompt}
+    ] + conversation_history + [
+        {"role": "user", "content": user_message}
+    ]
+
+
+def chat(transcript_text, user_message, conversation_history=None, context_chunks=None):
+    """챗봇 대화"""
+    try:
+        messages = build_messages(transcript_text, user_message, conversation_history, context_chunks)
+
+        response = openai_service.chat_completion(
+            'chat',
             model=Config.AI_MODEL,
             messages=messages,
             temperature=Config.AI_TEMPERATURE,
@@ -43,38 +264,152 @@ def chat(transcript_text, user_message, conversation_history=None):
 
     except Exception as e:
         print(f"❌ Chat API 에러: {e}")
-        return "죄송합니다. 현재 질문에 답변할 수 없습니다."
+        return CHAT_ERROR_MESSAGE
+
+
+def chat_stream(transcript_text, user_message, conversation_history=None, context_chunks=None):
+    """챗봇 대화 스트리밍 (생성되는 토큰 조각을 바로 yield)"""
+    messages = build_messages(transcript_text, user_message, conversation_history, context_chunks)
 
+    stream = openai_service.chat_completion_stream(
+        'chat',
+        model=Config.AI_MODEL,
+        messages=messages,
+        temperature=Config.AI_TEMPERATURE,
+        max_tokens=Config.AI_MAX_TOKENS
+    )
 
-def summarize_transcript(transcript_text):
-    """자막 전체를 AI로 요약"""
     try:
-        # 긴 텍스트는 앞부분만 사용
-        text_to_summarize = transcript_text[:4000]
-        
-        response = client.chat.completions.create(
-            model=Config.AI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "당신은 강의 내용을 핵심 요점 위주로 요약하는 전문가입니다. 한국어로 답변하세요."
-                },
-                {
-                    "role": "user",
-                    "content": f"""다음 강의 내용을 300자 이내로 핵심만 요약해주세요.
-                    
-강의 내용:
-{text_to_summarize}
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # 클라이언트가 중간에 끊어도 업스트림 연결은 정리
+        stream.close()
 
-요약:"""
-                }
-            ],
-            temperature=0.5,
-            max_tokens=500
-        )
 
-        return response.choices[0].message.content
+def summarize_transcript(transcript_text, index=None):
+    """자막 전체를 AI로 요약 (자막 해시로 캐시, 같은 자막의 동시 요청은 한 번만 실행)"""
+    key = hashlib.sha1(transcript_text.encode('utf-8')).hexdigest()
 
+    summary = summary_cache.get(key)
+    if summary is not None:
+        return summary
+
+    try:
+        return summary_flight.do(key, _summarize_and_cache, key, transcript_text, index)
     except Exception as e:
         print(f"❌ 요약 실패: {e}")
         return "요약을 생성할 수 없습니다."
+
+
+def _summarize_and_cache(key, transcript_text, index):
+    summary = summarize_long(transcript_text, index)
+    summary_cache.set(key, summary)
+    return summary
+
+
+def summarize_long(transcript_text, index=None):
+    """긴 자막 요약: 청크별 요약을 병렬 실행(map) 후 토큰 예산 안으로 묶어 반복 요약(reduce)"""
+    chunks = retrieval_service.chunk_transcript(
+        transcript_text, index, max_tokens=Config.SUMMARY_CHUNK_TOKENS
+    )
+    if not chunks:
+        raise ValueError("요약할 자막이 없습니다")
+
+    if len(chunks) == 1:
+        return _summarize_final(chunks[0]['text'])
+
+    print(f"📝 자막 요약: 청크 {len(chunks)}개 병렬 요약")
+    partials = _summarize_parallel([_chunk_label(chunk) + chunk['text'] for chunk in chunks])
+
+    # 중간 요약이 한 번에 넣기엔 길면 다시 묶어서 요약
+    while True:
+        groups = _group_by_tokens(partials, Config.SUMMARY_CHUNK_TOKENS)
+        if len(groups) == 1:
+            return _summarize_final('\n\n'.join(groups[0]))
+        partials = _summarize_parallel(['\n\n'.join(group) for group in groups])
+
+
+def _chunk_label(chunk):
+    if chunk.get('start') is None:
+        return ''
+    return f"[{format_time(chunk['start'])}~{format_time(chunk['end'])}]\n"
+
+
+def _summarize_parallel(texts):
+    """텍스트별 부분 요약을 요약 풀에서 동시에 실행 (순서 유지, 실패한 부분은 제외)"""
+    futures = [task_service.submit(_summarize_partial, text, pool='summary') for text in texts]
+
+    partials = []
+    for future in futures:
+        try:
+            partials.append(future.result())
+        except Exception as e:
+            print(f"❌ 부분 요약 실패: {e}")
+
+    if not partials:
+        raise RuntimeError("모든 부분 요약이 실패했습니다")
+    return partials
+
+
+def _group_by_tokens(texts, max_tokens):
+    """순서를 유지하며 토큰 예산 안으로 묶기"""
+    groups = [[]]
+    used = 0
+    for text in texts:
+        tokens = token_service.count_tokens(text)
+        if groups[-1] and used + tokens > max_tokens:
+            groups.append([])
+            used = 0
+        groups[-1].append(text)
+        used += tokens
+    return groups
+
+
+def _summarize_partial(text):
+    """강의 일부 구간 요약"""
+    response = openai_service.chat_completion(
+        'summary',
+        model=Config.AI_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"""다음은 긴 강의의 일부입니다. 이 구간에서 다룬 핵심 개념과 설명을 빠짐없이 간결하게 정리해주세요.
+
+강의 내용:
+{text}
+
+정리:"""
+            }
+        ],
+        temperature=0.3,
+        max_tokens=Config.SUMMARY_PARTIAL_TOKENS
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+def _summarize_final(text):
+    """최종 300자 요약"""
+    response = openai_service.chat_completion(
+        'summary',
+        model=Config.AI_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"""다음 강의 내용을 300자 이내로 핵심만 요약해주세요.
+                    
+강의 내용:
+{text}
+
+요약:"""
+            }
+        ],
+        temperature=0.5,
+        max_tokens=500
+    )
+
+    return response.choices[0].message.content
@@ -19,3 +19,123 @@ class Config:
     # Whisper 설정
     MAX_AUDIO_SIZE_MB = 25
     AUDIO_CHUNK_DURATION = 300  # 5분 단위로 분할
+
+    # 캐시 설정 (메모리 LRU + SQLite 디스크)
+    CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+    CACHE_DISK_ENABLED = os.getenv('CACHE_DISK_ENABLED', 'true').lower() == 'true'
+    TRANSCRIPT_CACHE_TTL = 24 * 60 * 60  # 자막 24시간
+    TRANSCRIPT_CACHE_MEMORY_ITEMS = 128
+    TRANSCRIPT_CACHE_MEMORY_MB = 64
+    TRANSCRIPT_CACHE_DISK_MB = 512
+    VIDEO_INFO_CACHE_TTL = 6 * 60 * 60  # 영상 정보 6시간
+
+    # OpenAI 클라이언트 설정 (공유 연결 풀)
+    OPENAI_MAX_CONNECTIONS = 32
+    OPENAI_MAX_KEEPALIVE = 16
+    OPENAI_MAX_IN_FLIGHT = 16  # 동시에 업스트림으로 보내는 최대 요청 수
+    OPENAI_CONNECT_TIMEOUT = 5
+    OPENAI_TIMEOUTS = {  # 작업별 응답 타임아웃 (초)
+        'chat': 30,
+        'quiz': 60,
+        'summary': 60,
+        'transcription': 120
+    }
+    OPENAI_MAX_RETRIES = 3
+    OPENAI_RETRY_BASE_DELAY = 0.5
+    OPENAI_RETRY_MAX_DELAY = 8
+
+    # LLM 요청 스케줄러 (계정 한도에 맞춰 설정)
+    LLM_RPM = int(os.getenv('LLM_RPM', '500'))
+    LLM_TPM = int(os.getenv('LLM_TPM', '200000'))
+    LLM_QUEUE_DEADLINES = {  # 우선순위별 최대 대기 시간 (초), 지나면 실행하지 않고 버림
+        'chat': 30,
+        'quiz': 60,
+        'summary': 120,
+        'background': 300
+    }
+
+    # 동시 작업 설정
+    IO_POOL_SIZE = 16
+
+    # YouTube 조회 타임아웃
+    TRANSCRIPT_FETCH_TIMEOUT = 20  # 자막 조회 타임아웃 (초)
+    VIDEO_INFO_TIMEOUT = 5  # 영상 정보 조회 타임아웃 (초)
+
+    # 업로드 청크 전사 설정
+    TRANSCRIBE_WORKERS = 4  # 긴 업로드 청크 동시 전사 수
+
+    # 비동기 작업 (긴 영상 전사)
+    JOB_DIR = os.getenv('JOB_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jobs'))
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))  # 동시에 실행할 작업 수
+    JOB_TTL = 7 * 24 * 60 * 60  # 완료/실패 작업 보관 기간
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))  # 최대 실행 횟수 (그 전까지는 실패해도 입력 파일을 남겨 두고 다시 실행)
+
+    # 업로드 영상 중복 제거 (SHA-256 → 전사 결과)
+    MEDIA_STORE_TTL = 30 * 24 * 60 * 60  # 30일
+    MEDIA_STORE_MEMORY_ITEMS = 64
+    MEDIA_STORE_MEMORY_MB = 64
+    MEDIA_STORE_DISK_MB = int(os.getenv('MEDIA_STORE_DISK_MB', '1024'))
+
+    # 실시간 전사: Whisper가 바로 받는 형식은 변환 없이 전송
+    WHISPER_PASSTHROUGH_FORMATS = ('webm', 'mp3', 'mp4', 'm4a', 'mpeg', 'mpga', 'ogg', 'oga', 'wav', 'flac')
+    WHISPER_SKIP_TRANSCODE = os.getenv('WHISPER_SKIP_TRANSCODE', 'true').lower() == 'true'
+
+    # 실시간 전사 음성 감지 (무음/소음 청크는 Whisper 호출 생략)
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+    VAD_WINDOW_SECONDS = 10  # 누적 녹음 중 마지막 구간만 검사 (마지막 전사 이후가 더 길면 그만큼, 0이면 전체)
+    VAD_TAIL_BYTES = 256 * 1024  # 기본 검사 구간만큼 누적 webm 녹음 끝쪽 디코딩량 (+클러스터 하나, 구간에 비례)
+    VAD_MAX_WINDOW_SECONDS = 60  # 마지막 전사 이후 이보다 길게 쌓였으면 검사 없이 전사
+    VAD_FRAME_MS = 30
+    VAD_ENERGY_DB = -45  # 음성 프레임 최소 에너지 (dBFS)
+    VAD_SNR_DB = 10  # 소음 바닥 대비 최소 차이 (dB)
+    VAD_MIN_SPEECH_RATIO = 0.1  # 음성 프레임 비율이 이보다 낮으면 무음으로 판단
+
+    # 퀴즈 미리 생성 설정
+    QUIZ_PREFETCH_WORKERS = 4
+    QUIZ_PREFETCH_TOLERANCE = 30  # 스케줄 시간과 요청 시간의 허용 오차 (초)
+    QUIZ_PREFETCH_WAIT = 5  # 이미 생성 중인 퀴즈를 기다리는 최대 시간 (초, 넘으면 새로 생성)
+    QUIZ_PREFETCH_SESSIONS = 1000  # 미리 생성 퀴즈를 보관할 최대 세션 수
+    QUIZ_PREFETCH_TTL = 3 * 60 * 60  # 미리 생성 퀴즈 보관 시간 (초)
+
+    # 퀴즈 캐시 설정
+    QUIZ_CACHE_TTL = 7 * 24 * 60 * 60  # 7일
+    QUIZ_CACHE_MEMORY_ITEMS = 1024
+    QUIZ_CACHE_DISK = True
+    QUIZ_CACHE_DISK_MB = 128
+    QUIZ_CACHE_VARY = False  # True면 같은 구간에도 풀에서 다양한 퀴즈 제공
+    QUIZ_CACHE_POOL_SIZE = 3
+
+    # 퀴즈 컨텍스트 토큰 예산 (현재 시간 직전 구간)
+    QUIZ_CONTEXT_TOKENS = 1500
+    SPEECH_CHARS_PER_SECOND = 7  # 타임스탬프/영상 길이가 없을 때 시청 위치 추정용 말하기 속도
+
+    # 퀴즈 일괄 생성 설정
+    QUIZ_BATCH_SIZE = 5  # LLM 호출 1회당 최대 구간 수
+    QUIZ_BATCH_TOKENS_PER_QUIZ = 350  # 퀴즈 1개당 출력 토큰 예산
+
+    # 챗봇 자막 검색 설정 (BM25)
+    CHAT_CHUNK_TOKENS = 200  # 검색 단위 청크 크기
+    CHAT_CONTEXT_TOKENS = 1200  # 질문당 시스템 프롬프트에 넣을 자막 토큰 예산
+    CHAT_TOP_K = 6  # 질문당 최대 청크 수
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+
+    # 챗봇 대화 기록 설정
+    CHAT_HISTORY_TOKENS = 2000  # 프롬프트에 그대로 넣을 최근 대화 토큰 예산
+    CHAT_SUMMARY_TOKENS = 300  # 오래된 대화 누적 요약 최대 길이
+    CHAT_PENDING_TOKENS = 2000  # 요약 대기 중인 대화 최대 토큰 (넘으면 오래된 것부터 버림)
+    CHAT_SUMMARY_RETRY_BASE_DELAY = 10  # 대화 요약 실패 후 재시도 대기 (초, 실패할 때마다 2배)
+    CHAT_SUMMARY_RETRY_MAX_DELAY = 300
+    CHAT_SUMMARY_WORKERS = 2
+
+    # 자막 요약 설정 (청크별 요약 → 합쳐서 최종 요약)
+    SUMMARY_CHUNK_TOKENS = 3000  # 청크/중간 요약 묶음당 입력 토큰 예산
+    SUMMARY_PARTIAL_TOKENS = 300  # 청크별 요약 최대 출력 토큰
+    SUMMARY_WORKERS = 4
+    SUMMARY_CACHE_TTL = 7 * 24 * 60 * 60  # 7일
+
+    # 챗봇 답변 캐시 (영상별 첫 질문)
+    CHAT_ANSWER_CACHE_ENABLED = os.getenv('CHAT_ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    CHAT_ANSWER_CACHE_TTL = 24 * 60 * 60  # 24시간
+    CHAT_ANSWER_CACHE_ITEMS = 2048
+    CHAT_ANSWER_CACHE_DISK = True
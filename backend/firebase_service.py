@@ -246,6 +246,15 @@ def add_uploaded_lecture(lecture_data):
         return None
 
 
+def update_lecture(lecture_id, fields):
+    if not db: return False
+    try:
+        db.collection('lectures').document(lecture_id).update(fields)
+        return True
+    except:
+        return False
+
+
 def delete_lecture(lecture_id):
     if not db: return False
     try:
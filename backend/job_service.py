@@ -0,0 +1,213 @@
+# backend/job_service.py
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from config import Config
+import task_service
+
+# 작업 종류별 실행 함수: handler(input_path, params, progress) → JSON 직렬화 가능한 결과
+_handlers = {}
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _db():
+    """작업 상태 저장소 (SQLite, 재시작 후 복구용)"""
+    global _conn
+    if _conn is None:
+        os.makedirs(Config.JOB_DIR, exist_ok=True)
+        _conn = sqlite3.connect(os.path.join(Config.JOB_DIR, 'jobs.sqlite3'), check_same_thread=False, timeout=10)
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                input_path TEXT,
+                done INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                partial TEXT NOT NULL DEFAULT '',
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # 재시도 횟수 컬럼이 없던 기존 저장소
+        columns = {row[1] for row in _conn.execute('PRAGMA table_info(jobs)')}
+        if 'attempts' not in columns:
+            _conn.execute('ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+        _conn.commit()
+    return _conn
+
+
+def _execute(sql, args=()):
+    with _lock:
+        conn = _db()
+        cursor = conn.execute(sql, args)
+        conn.commit()
+        return cursor.rowcount
+
+
+def _fetch(sql, args=()):
+    with _lock:
+        return _db().execute(sql, args).fetchall()
+
+
+def register(kind, handler):
+    """작업 종류 등록"""
+    _handlers[kind] = handler
+
+
+def input_path_for(job_id):
+    """작업 입력 파일 경로 (작업 디렉터리에 보관해야 재시작 후에도 다시 실행 가능)"""
+    return os.path.join(Config.JOB_DIR, 'inputs', job_id)
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def submit(kind, params, job_id=None, input_path=None):
+    """작업 등록 후 바로 작업 ID 반환 (실행은 작업 풀에서, 등록되지 않은 종류면 ValueError)"""
+    if kind not in _handlers:
+        raise ValueError(f"등록되지 않은 작업 종류: {kind}")
+    job_id = job_id or new_job_id()
+    now = time.time()
+    _execute(
+        'INSERT INTO jobs (id, kind, status, params, input_path, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (job_id, kind, 'queued', json.dumps(params, ensure_ascii=False), input_path, now, now)
+    )
+    task_service.submit(_run, job_id, pool='jobs')
+    return job_id
+
+
+def _run(job_id):
+    """작업 실행 (대기 상태인 작업만 가져가서 중복 실행 방지)"""
+    claimed = _execute(
+        "UPDATE jobs SET status = 'running', owner = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+        (os.getpid(), time.time(), job_id)
+    )
+    if not claimed:
+        return
+
+    row = _fetch('SELECT kind, params, input_path FROM jobs WHERE id = ?', (job_id,))[0]
+    kind, params, input_path = row[0], json.loads(row[1]), row[2]
+
+    def progress(done, total, partial=None):
+        """진행 상황 기록 (partial: 지금까지의 부분 결과 텍스트)"""
+        if partial is None:
+            _execute('UPDATE jobs SET done = ?, total = ?, updated_at = ? WHERE id = ?',
+                     (done, total, time.time(), job_id))
+        else:
+            _execute('UPDATE jobs SET done = ?, total = ?, partial = ?, updated_at = ? WHERE id = ?',
+                     (done, total, partial, time.time(), job_id))
+
+    started_at = time.perf_counter()
+    try:
+        result = _handlers[kind](input_path, params, progress)
+    except Exception as e:
+        _execute("UPDATE jobs SET attempts = attempts + 1, error = ?, updated_at = ? WHERE id = ?",
+                 (str(e), time.time(), job_id))
+        attempts = _fetch('SELECT attempts FROM jobs WHERE id = ?', (job_id,))[0][0]
+        if attempts < Config.JOB_MAX_ATTEMPTS:
+            # 입력 파일은 남겨 두고 다시 대기열로
+            print(f"🔁 작업 재시도 {attempts}/{Config.JOB_MAX_ATTEMPTS}: {job_id} ({kind}): {e}")
+            _execute("UPDATE jobs SET status = 'queued', done = 0, partial = '' WHERE id = ?", (job_id,))
+            task_service.submit(_run, job_id, pool='jobs')
+            return
+        print(f"❌ 작업 실패: {job_id} ({kind}, {attempts}회 시도): {e}")
+        _execute("UPDATE jobs SET status = 'failed', updated_at = ? WHERE id = ?", (time.time(), job_id))
+        _remove_input(input_path)
+        return
+
+    _execute(
+        "UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+        (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+    )
+    _remove_input(input_path)
+    print(f"✅ 작업 완료: {job_id} ({kind}, {time.perf_counter() - started_at:.1f}초)")
+
+
+def _remove_input(input_path):
+    """완료 또는 재시도 한도 초과로 더 이상 필요 없는 입력 파일 삭제"""
+    if input_path and os.path.exists(input_path):
+        os.unlink(input_path)
+
+
+def get(job_id):
+    """작업 상태 (없으면 None)"""
+    rows = _fetch(
+        'SELECT id, kind, status, params, done, total, partial, result, error, created_at, updated_at '
+        'FROM jobs WHERE id = ?', (job_id,)
+    )
+    if not rows:
+        return None
+    row = rows[0]
+    return {
+        'id': row[0],
+        'kind': row[1],
+        'status': row[2],
+        'params': json.loads(row[3]),
+        'done': row[4],
+        'total': row[5],
+        'partial': row[6],
+        'result': json.loads(row[7]) if row[7] else None,
+        'error': row[8],
+        'created_at': row[9],
+        'updated_at': row[10]
+    }
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def recover():
+    """서버 시작 시 미완료 작업 다시 실행 + 오래된 작업 정리"""
+    _execute('DELETE FROM jobs WHERE updated_at < ? AND status IN (?, ?)',
+             (time.time() - Config.JOB_TTL, 'done', 'failed'))
+
+    # 종료된 프로세스가 실행하던 작업은 대기 상태로 되돌림
+    for job_id, owner in _fetch("SELECT id, owner FROM jobs WHERE status = 'running'"):
+        if owner is None or owner == os.getpid() or not _process_alive(owner):
+            _execute("UPDATE jobs SET status = 'queued', done = 0, partial = '' WHERE id = ? AND status = 'running'",
+                     (job_id,))
+
+    queued = _fetch("SELECT id, kind, input_path FROM jobs WHERE status = 'queued' ORDER BY created_at")
+    for job_id, kind, input_path in queued:
+        if kind not in _handlers or (input_path and not os.path.exists(input_path)):
+            _execute("UPDATE jobs SET status = 'failed', error = ? WHERE id = ?", ('재시작 후 입력 파일 없음', job_id))
+            continue
+        task_service.submit(_run, job_id, pool='jobs')
+
+    if queued:
+        print(f"🔁 미완료 작업 {len(queued)}개 복구")
+
+
+def save_input(job_id, stream):
+    """업로드 본문을 작업 입력 파일로 저장 → 경로"""
+    path = input_path_for(job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+    return path
+
+
+def get_stats():
+    """상태별 작업 수"""
+    return {status: count for status, count in _fetch('SELECT status, COUNT(*) FROM jobs GROUP BY status')}
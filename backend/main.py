@@ -1,12 +1,39 @@
 # backend/main.py
-from flask import Flask, request, jsonify
+import importlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+_boot_started = time.perf_counter()
+STARTUP_TIMINGS = {}  # 모듈별 import 시간 (ms)
+
+
+def _timed_import(module_name):
+    """모듈 import 시간 측정 (워커 부팅 시간 리포트용)"""
+    started_at = time.perf_counter()
+    module = importlib.import_module(module_name)
+    STARTUP_TIMINGS[module_name] = round((time.perf_counter() - started_at) * 1000, 1)
+    return module
+
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from config import Config
-import youtube_service
-import quiz_service
-import chat_service
-import whisper_service
-import firebase_service
+youtube_service = _timed_import('youtube_service')
+quiz_service = _timed_import('quiz_service')
+chat_service = _timed_import('chat_service')
+whisper_service = _timed_import('whisper_service')
+firebase_service = _timed_import('firebase_service')
+retrieval_service = _timed_import('retrieval_service')
+import cache_service
+import job_service
+import media_service
+import openai_service
+import task_service
+import transcript_index
+import vad_service
 
 app = Flask(__name__)
 CORS(app, origins="*")
@@ -14,6 +41,10 @@ CORS(app, origins="*")
 # 세션 저장소
 sessions = {}
 
+STARTUP_TIMINGS['total'] = round((time.perf_counter() - _boot_started) * 1000, 1)
+print(f"⏱️ 부팅 시간: {STARTUP_TIMINGS['total']}ms " +
+      ', '.join(f"{name}={ms}ms" for name, ms in STARTUP_TIMINGS.items() if name != 'total'))
+
 
 # ==================== YouTube API ====================
 @app.route('/api/youtube/load', methods=['POST'])
@@ -38,10 +69,14 @@ def load_youtube_video():
         sessions[user_id] = {
             'video_id': result['video_id'],
             'transcript': transcript,
+            'index': transcript['timestamps'],  # 영상별 공유 TranscriptIndex
+            'retriever': retrieval_service.get_retriever(
+                transcript['text'], transcript['timestamps'], key=f"youtube:{result['video_id']}"
+            ),
             'duration': duration,
             'title': result.get('title', ''),
             'current_score': 0,
-            'conversation_history': []
+            'conversation': chat_service.ConversationMemory()
         }
 
         return jsonify({
@@ -71,7 +106,7 @@ def summarize_youtube():
             raise Exception("먼저 영상을 로드하세요.")
 
         transcript_text = sessions[user_id]['transcript']['text']
-        summary = chat_service.summarize_transcript(transcript_text)
+        summary = chat_service.summarize_transcript(transcript_text, sessions[user_id].get('index'))
 
         return jsonify({
             'success': True,
@@ -84,62 +119,99 @@ def summarize_youtube():
 
 
 # ==================== Quiz API ====================
+def _quiz_session_key(user_id, session):
+    """미리 생성된 퀴즈 조회 키 (영상이 바뀌면 이전 퀴즈는 사용하지 않음)"""
+    return f"{user_id}:{session.get('video_id') or session.get('video_file', '')}"
+
+
+def _session_quiz_context(session, current_time):
+    """세션 자막 중 current_time 직전 구간 (토큰 예산 기준)"""
+    return quiz_service.select_quiz_context(
+        session['transcript'].get('text', ''), session.get('index'), current_time,
+        duration=session.get('duration')
+    )
+
+
+def _resolve_quiz_context(data, current_time):
+    """요청 기준 퀴즈 컨텍스트 → (컨텍스트, 미리 생성 조회 키), 세션이 없으면 (None, None)"""
+    # ★ transcript를 직접 전달받을 수 있도록 수정
+    direct_transcript = data.get('transcript', None)
+
+    # ★ 직접 전달된 transcript가 있으면 그것 사용
+    if direct_transcript:
+        timestamps = data.get('timestamps', [])
+
+        index = None
+        if timestamps:
+            # ★ 같은 강의는 인덱스를 한 번만 만들고 재사용
+            index = transcript_index.get_index(
+                timestamps, key=transcript_index.text_key(direct_transcript)
+            )
+        # timestamps 없으면 영상 길이 대비 위치로 현재 시간 직전 구간 사용
+        return quiz_service.select_quiz_context(
+            direct_transcript, index, current_time, duration=data.get('duration')
+        ), None
+
+    # 기존 세션 기반 로직
+    user_id = data.get('user_id', 'guest')
+    if user_id not in sessions:
+        return None, None
+
+    session = sessions[user_id]
+    # 현재 시간 직전 구간의 자막만 추출
+    return _session_quiz_context(session, current_time), _quiz_session_key(user_id, session)
+
+
+def _sse(event, payload):
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
 @app.route('/api/quiz/generate', methods=['POST'])
 def generate_quiz():
     """퀴즈 생성 (현재 시청 시간까지의 내용으로)"""
     try:
         data = request.json
-        user_id = data.get('user_id', 'guest')
         current_time = data.get('current_time', 0)
         num_quizzes = data.get('num_quizzes', 1)
-        
-        # ★ transcript를 직접 전달받을 수 있도록 수정
-        direct_transcript = data.get('transcript', None)
 
-        # ★ 직접 전달된 transcript가 있으면 그것 사용
-        if direct_transcript:
-            timestamps = data.get('timestamps', [])
-            
-            if timestamps and current_time > 0:
-                # ★ timestamps 기반으로 현재 시간까지 텍스트 추출
-                filtered_text = get_transcript_until_time(timestamps, current_time)
-            else:
-                # timestamps 없으면 전체 사용
-                filtered_text = direct_transcript
-        else:
-            # 기존 세션 기반 로직
-            if user_id not in sessions:
-                return jsonify({
-                    'success': False,
-                    'error': '세션을 찾을 수 없습니다.'
-                }), 404
+        context, session_key = _resolve_quiz_context(data, current_time)
+        if context is None:
+            return jsonify({
+                'success': False,
+                'error': '세션을 찾을 수 없습니다.'
+            }), 404
 
-            session = sessions[user_id]
-            transcript = session['transcript']
-            
-            # 현재 시간까지의 자막만 추출
-            if 'timestamps' in transcript and current_time > 0:
-                filtered_text = youtube_service.get_transcript_until_time(
-                    transcript['timestamps'], 
-                    current_time
-                )
-            else:
-                filtered_text = transcript.get('text', '')
+        # ★ 스케줄 시 미리 생성해 둔 퀴즈가 있으면 바로 반환
+        if session_key:
+            quizzes, usage = quiz_service.take_prefetched_quiz(session_key, current_time, num_quizzes)
+            if quizzes:
+                print(f'⚡ 미리 생성된 퀴즈 사용: {len(quizzes)}개')
+                return jsonify({
+                    'success': True,
+                    'quizzes': quizzes,
+                    'quiz_count': len(quizzes),
+                    'prefetched': True,
+                    'usage': usage
+                })
         
-        print(f"📌 퀴즈 생성에 사용할 텍스트 (앞 100자): {filtered_text[:100]}...")
+        filtered_text = context['text']
+        print(f"📌 퀴즈 생성에 사용할 텍스트 ({context['tokens']}토큰, 앞 100자): {filtered_text[:100]}...")
 
         # 퀴즈 생성
-        quizzes = quiz_service.generate_quiz_from_segment(filtered_text, num_quizzes)
+        quizzes, usage = quiz_service.generate_quiz_with_usage(filtered_text, num_quizzes)
 
         if not quizzes:
             raise Exception("퀴즈 생성에 실패했습니다.")
 
-        print(f'✅ 퀴즈 생성 완료: {len(quizzes)}개')
+        print(f'✅ 퀴즈 생성 완료: {len(quizzes)}개, 사용량: {usage}')
 
         return jsonify({
             'success': True,
             'quizzes': quizzes,
-            'quiz_count': len(quizzes)
+            'quiz_count': len(quizzes),
+            'context_range': [context['start'], context['end']],
+            'usage': usage
         })
 
     except Exception as e:
@@ -149,6 +221,47 @@ def generate_quiz():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/quiz/generate/stream', methods=['POST'])
+def generate_quiz_stream():
+    """퀴즈 스트리밍 생성 (SSE - 완성된 퀴즈부터 하나씩 전송)"""
+    data = request.json or {}
+    current_time = data.get('current_time', 0)
+    num_quizzes = data.get('num_quizzes', 1)
+
+    context, session_key = _resolve_quiz_context(data, current_time)
+    if context is None:
+        return jsonify({
+            'success': False,
+            'error': '세션을 찾을 수 없습니다.'
+        }), 404
+
+    prefetched = None
+    if session_key:
+        prefetched, _ = quiz_service.take_prefetched_quiz(session_key, current_time, num_quizzes)
+
+    def events():
+        count = 0
+        try:
+            quizzes = prefetched or quiz_service.stream_quizzes(context['text'], num_quizzes)
+            for quiz in quizzes:
+                count += 1
+                yield _sse('quiz', quiz)
+
+            if count == 0:
+                yield _sse('error', {'error': '퀴즈 생성에 실패했습니다.'})
+            else:
+                yield _sse('done', {'quiz_count': count, 'prefetched': bool(prefetched)})
+        except Exception as e:
+            print(f"❌ 퀴즈 스트리밍 에러: {e}")
+            yield _sse('error', {'error': str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/quiz/schedule', methods=['POST'])
 def schedule_quizzes():
     """퀴즈 스케줄 생성 (출제 시간 계산)"""
@@ -183,6 +296,14 @@ def schedule_quizzes():
 
         print(f'✅ 퀴즈 타임 생성 완료: {quiz_times}')
 
+        session['quiz_times'] = quiz_times
+
+        # 시청 중 대기하지 않도록 시간별 퀴즈를 백그라운드에서 미리 생성
+        quiz_service.prefetch_quizzes(
+            _quiz_session_key(user_id, session),
+            {quiz_time: _session_quiz_context(session, quiz_time)['text'] for quiz_time in quiz_times}
+        )
+
         return jsonify({
             'success': True,
             'quiz_times': quiz_times,
@@ -196,6 +317,58 @@ def schedule_quizzes():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/quiz/batch', methods=['POST'])
+def generate_quiz_batch():
+    """스케줄된 모든 시간의 퀴즈를 한 번에 생성 (시간별 왕복 대신 일괄 LLM 호출)"""
+    try:
+        data = request.json
+        user_id = data.get('user_id', 'guest')
+        num_quizzes = data.get('num_quizzes', 1)
+
+        if user_id not in sessions:
+            return jsonify({
+                'success': False,
+                'error': '세션을 찾을 수 없습니다.'
+            }), 404
+
+        session = sessions[user_id]
+        quiz_times = data.get('quiz_times') or session.get('quiz_times', [])
+        if not quiz_times:
+            return jsonify({
+                'success': False,
+                'error': '퀴즈 스케줄이 없습니다.'
+            }), 400
+
+        # 미리 생성된 퀴즈는 그대로 쓰고 나머지만 일괄 생성
+        session_key = _quiz_session_key(user_id, session)
+        results = {}
+        missing = {}
+        for quiz_time in quiz_times:
+            quizzes, usage = quiz_service.take_prefetched_quiz(session_key, quiz_time, num_quizzes)
+            if quizzes:
+                results[quiz_time] = (quizzes, usage)
+            else:
+                missing[quiz_time] = _session_quiz_context(session, quiz_time)['text']
+
+        if missing:
+            results.update(quiz_service.generate_quizzes_batch(missing, num_quizzes))
+
+        print(f'✅ 일괄 퀴즈 생성 완료: {len(results)}개 구간 (새로 생성 {len(missing)}개)')
+
+        return jsonify({
+            'success': True,
+            'quizzes': {str(t): quizzes for t, (quizzes, _) in results.items()},
+            'usage': {str(t): usage for t, (_, usage) in results.items()},
+            'quiz_times': quiz_times
+        })
+
+    except Exception as e:
+        print(f"❌ 일괄 퀴즈 생성 에러: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/quiz/submit', methods=['POST'])
 def submit_quiz():
     """퀴즈 제출"""
@@ -238,27 +411,35 @@ def chat_endpoint():
             return jsonify({'success': False, 'error': '먼저 영상을 로드하세요'}), 400
         
         transcript_text = sessions[user_id]['transcript']['text']
-        conversation_history = sessions[user_id].get('conversation_history', [])
+        conversation_history = sessions[user_id]['conversation'].messages()
+
+        # 첫 질문은 같은 강의의 캐시된 답변 재사용
+        cache_key = _answer_cache_key(sessions[user_id], data, user_message, conversation_history)
+        cached = chat_service.get_cached_answer(cache_key) if cache_key else None
+        if cached:
+            _append_conversation(sessions[user_id], user_message, cached['response'])
+            return jsonify({'success': True, **cached, 'cached': True})
+
+        context_chunks = _search_chat_context(sessions[user_id], user_message)
         
         assistant_response = chat_service.chat(
             transcript_text,
             user_message,
-            conversation_history
+            conversation_history,
+            context_chunks
         )
+        sources = _chat_sources(context_chunks)
+        if cache_key:
+            chat_service.cache_answer(cache_key, assistant_response, sources)
         
         # 대화 기록 업데이트
-        sessions[user_id]['conversation_history'].extend([
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": assistant_response}
-        ])
-        
-        # 최근 20개만 유지
-        if len(sessions[user_id]['conversation_history']) > 20:
-            sessions[user_id]['conversation_history'] = sessions[user_id]['conversation_history'][-20:]
+        _append_conversation(sessions[user_id], user_message, assistant_response)
         
         return jsonify({
             'success': True,
-            'response': assistant_response
+            'response': assistant_response,
+            'sources': sources,
+            'cached': False
         })
         
     except Exception as e:
@@ -266,6 +447,114 @@ def chat_endpoint():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """AI 챗봇 대화 스트리밍 (SSE - 토큰 단위 전송)"""
+    data = request.json or {}
+    user_id = data.get('user_id', 'guest')
+    user_message = data.get('message')
+
+    if not user_message:
+        return jsonify({'success': False, 'error': '메시지를 입력하세요'}), 400
+
+    if user_id not in sessions:
+        return jsonify({'success': False, 'error': '먼저 영상을 로드하세요'}), 400
+
+    session = sessions[user_id]
+    transcript_text = session['transcript']['text']
+    conversation_history = session['conversation'].messages()
+
+    cache_key = _answer_cache_key(session, data, user_message, conversation_history)
+    cached = chat_service.get_cached_answer(cache_key) if cache_key else None
+    if cached:
+        def cached_events():
+            _append_conversation(session, user_message, cached['response'])
+            yield _sse('token', {'content': cached['response']})
+            yield _sse('done', {**cached, 'cached': True})
+
+        return Response(
+            cached_events(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    context_chunks = _search_chat_context(session, user_message)
+
+    def events():
+        tokens = chat_service.chat_stream(
+            transcript_text, user_message, conversation_history, context_chunks
+        )
+        parts = []
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield _sse('token', {'content': token})
+
+            # 스트림이 끝까지 완료된 경우에만 대화 기록에 추가
+            assistant_response = ''.join(parts)
+            sources = _chat_sources(context_chunks)
+            if cache_key:
+                chat_service.cache_answer(cache_key, assistant_response, sources)
+            _append_conversation(session, user_message, assistant_response)
+            yield _sse('done', {
+                'response': assistant_response,
+                'sources': sources,
+                'cached': False
+            })
+        except Exception as e:
+            print(f"❌ 채팅 스트리밍 에러: {e}")
+            yield _sse('error', {'error': chat_service.CHAT_ERROR_MESSAGE})
+        finally:
+            # 클라이언트 연결 종료 시에도 업스트림 스트림 정리
+            tokens.close()
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _answer_cache_key(session, data, user_message, conversation_history):
+    """답변 캐시 키 (대화 기록이 없는 첫 질문만, 요청에 use_cache=false면 사용 안 함)"""
+    if not Config.CHAT_ANSWER_CACHE_ENABLED or not data.get('use_cache', True):
+        return None
+    if conversation_history:
+        return None
+
+    if 'transcript_key' not in session:
+        session['transcript_key'] = transcript_index.text_key(session['transcript']['text'])
+    return chat_service.answer_cache_key(session['transcript_key'], user_message)
+
+
+def _search_chat_context(session, user_message):
+    """질문과 관련된 자막 청크 검색 (검색기가 없거나 실패하면 None → 앞부분 사용)"""
+    retriever = session.get('retriever')
+    if retriever is None:
+        return None
+    try:
+        return retriever.search(user_message)
+    except Exception as e:
+        print(f"❌ 자막 검색 실패: {e}")
+        return None
+
+
+def _chat_sources(context_chunks):
+    """답변 근거 구간 (UI에서 해당 시점으로 이동용)"""
+    return [
+        {'start': chunk['start'], 'end': chunk['end'], 'score': chunk['score']}
+        for chunk in context_chunks or []
+        if chunk.get('start') is not None
+    ]
+
+
+def _append_conversation(session, user_message, assistant_response):
+    """대화 기록 추가 (토큰 예산 초과분은 백그라운드에서 요약, 오류 응답은 기록하지 않음)"""
+    if assistant_response == chat_service.CHAT_ERROR_MESSAGE:
+        return
+    session['conversation'].append(user_message, assistant_response)
+
+
 # ==================== Whisper API ====================
 @app.route('/api/whisper/transcribe', methods=['POST'])
 def transcribe_audio():
@@ -275,12 +564,17 @@ def transcribe_audio():
             return jsonify({'success': False, 'error': '오디오 파일 없음'}), 400
         
         audio_file = request.files['audio']
+        final = request.form.get('final', 'false').lower() == 'true'
+        since_seconds = request.form.get('since_seconds', type=float)
         
-        transcript = whisper_service.transcribe(audio_file)
+        timings = {}
+        transcript = whisper_service.transcribe(audio_file, timings, final=final, since_seconds=since_seconds)
         
         return jsonify({
             'success': True,
-            'transcript': transcript
+            'transcript': transcript,
+            'skipped': timings.get('vad_skipped', False),
+            'timings': timings
         })
         
     except Exception as e:
@@ -292,26 +586,28 @@ def transcribe_audio():
 def extract_video_audio():
     """비디오에서 오디오 추출 후 전사"""
     try:
-        if 'video' not in request.files:
-            return jsonify({'success': False, 'error': '비디오 파일이 없습니다'}), 400
-
-        video_file = request.files['video']
-        user_id = request.form.get('user_id', 'guest')
-        
-        result = whisper_service.extract_and_transcribe(video_file)
+        if request.mimetype == 'multipart/form-data':
+            if 'video' not in request.files:
+                return jsonify({'success': False, 'error': '비디오 파일이 없습니다'}), 400
+
+            video_file = request.files['video']
+            user_id = request.form.get('user_id', 'guest')
+            filename = video_file.filename
+            result = media_service.transcribe_upload(video_file)
+        else:
+            # 본문이 비디오 자체면 업로드를 받는 동안 추출/전사 진행
+            user_id = request.args.get('user_id', 'guest')
+            filename = request.args.get('filename', '')
+            result = media_service.transcribe_upload_stream(request.stream, request.content_length)
         
-        sessions[user_id] = {
-            'video_file': video_file.filename,
-            'transcript': {'text': result['transcript']},
-            'current_score': 0,
-            'conversation_history': []
-        }
+        _set_extract_session(user_id, filename, result)
         
         return jsonify({
             'success': True,
             'transcript': result['transcript'],
             'duration': result['duration'],
-            'timestamps': result['timestamps']
+            'timestamps': result['timestamps'].to_list(),
+            'failed_chunks': result['failed_chunks']
         })
 
     except Exception as e:
@@ -320,6 +616,111 @@ def extract_video_audio():
 
 
 
+def _set_extract_session(user_id, filename, result):
+    """업로드 영상 전사 결과로 세션 설정"""
+    sessions[user_id] = {
+        'video_file': filename,
+        'transcript': {'text': result['transcript']},
+        'index': result['timestamps'],
+        'retriever': retrieval_service.get_retriever(result['transcript'], result['timestamps']),
+        'current_score': 0,
+        'conversation': chat_service.ConversationMemory()
+    }
+
+
+def _run_extract_job(input_path, params, progress):
+    """비동기 전사 작업 (job_service 핸들러) - 완료 시 작업 등록 사용자 세션을 한 번만 설정"""
+    result = media_service.transcribe_file(input_path, on_progress=progress)
+    _set_extract_session(params['user_id'], params['filename'], result)
+    return media_service.encode_result(result)
+
+
+@app.route('/api/whisper/jobs', methods=['POST'])
+def submit_extract_job():
+    """비디오 전사 작업 등록 (업로드가 끝나면 바로 작업 ID 반환, 처리는 백그라운드)"""
+    input_path = None
+    try:
+        job_id = job_service.new_job_id()
+        if request.mimetype == 'multipart/form-data':
+            if 'video' not in request.files:
+                return jsonify({'success': False, 'error': '비디오 파일이 없습니다'}), 400
+            video_file = request.files['video']
+            user_id = request.form.get('user_id', 'guest')
+            filename = video_file.filename
+            input_path = job_service.save_input(job_id, video_file.stream)
+        else:
+            user_id = request.args.get('user_id', 'guest')
+            filename = request.args.get('filename', '')
+            input_path = job_service.save_input(job_id, request.stream)
+
+        job_service.submit(
+            'whisper_extract', {'user_id': user_id, 'filename': filename},
+            job_id=job_id, input_path=input_path
+        )
+        return jsonify({'success': True, 'job_id': job_id}), 202
+
+    except Exception as e:
+        print(f"❌ 작업 등록 에러: {e}")
+        # 등록되지 않은 작업의 입력 파일은 남기지 않음
+        if input_path and os.path.exists(input_path):
+            os.remove(input_path)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/whisper/jobs/<job_id>', methods=['GET'])
+def get_extract_job(job_id):
+    """작업 진행 상황 (완료 청크 수/전체)"""
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'done': job['done'],
+        'total': job['total'],
+        'error': job['error']
+    })
+
+
+@app.route('/api/whisper/jobs/<job_id>/partial', methods=['GET'])
+def get_extract_job_partial(job_id):
+    """지금까지 전사된 부분 텍스트"""
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+
+    return jsonify({
+        'success': True,
+        'status': job['status'],
+        'done': job['done'],
+        'total': job['total'],
+        'transcript': job['partial']
+    })
+
+
+@app.route('/api/whisper/jobs/<job_id>/result', methods=['GET'])
+def get_extract_job_result(job_id):
+    """최종 결과 (조회만 함, 세션은 작업 완료 시 설정됨)"""
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': job['error']}), 500
+    if job['status'] != 'done':
+        return jsonify({'success': False, 'status': job['status'], 'error': '아직 처리 중입니다'}), 409
+
+    result = job['result']
+    return jsonify({
+        'success': True,
+        'transcript': result['transcript'],
+        'duration': result['duration'],
+        'timestamps': result['timestamps'],
+        'failed_chunks': result['failed_chunks']
+    })
+
+
 # ==================== Video Complete API ====================
 @app.route('/api/video/complete', methods=['POST'])
 def complete_video():
@@ -578,6 +979,9 @@ def get_lecture():
 
 @app.route('/api/lectures/upload', methods=['POST'])
 def upload_lecture():
+    """강의 업로드 (전사는 비동기 작업으로 처리하고 완료되면 강의 문서에 반영)"""
+    input_path = None
+    temp_thumb = None
     try:
         # 비디오 파일 받기
         video_file = request.files.get('video')
@@ -587,40 +991,60 @@ def upload_lecture():
         if not video_file:
             return jsonify({'success': False, 'message': '비디오 파일이 필요합니다'})
         
-        # 임시 저장
-        temp_video = f'/tmp/{video_file.filename}'
-        temp_thumb = f'/tmp/thumb_{video_file.filename}.jpg'
-        video_file.save(temp_video)
+        # 작업 입력으로 저장 (전사 작업이 끝나면 job_service가 삭제)
+        job_id = job_service.new_job_id()
+        input_path = job_service.save_input(job_id, video_file.stream)
+        temp_thumb = os.path.join(tempfile.gettempdir(), f'thumb_{job_id}.jpg')
         
         # ffmpeg로 썸네일 추출 (5초 지점)
         subprocess.run([
-            'ffmpeg', '-i', temp_video, '-ss', '00:00:05',
+            'ffmpeg', '-i', input_path, '-ss', '00:00:05',
             '-vframes', '1', '-q:v', '2', temp_thumb, '-y'
         ], capture_output=True)
         
         # Firebase Storage에 업로드
-        video_url = firebase_service.upload_file_to_storage(temp_video, f'lectures/{video_file.filename}')
+        video_url = firebase_service.upload_file_to_storage(input_path, f'lectures/{video_file.filename}')
         thumbnail_url = firebase_service.upload_file_to_storage(temp_thumb, f'thumbnails/{video_file.filename}.jpg')
         
-        # Firestore에 저장
+        # Firestore에 저장 (자막은 /api/whisper/jobs/<transcriptJobId>로 진행 상황 확인)
         lecture_data = {
             'title': title,
             'description': description,
             'videoUrl': video_url,
             'thumbnailUrl': thumbnail_url,
-            'transcript': result['transcript'],
-            'duration': result['duration'],
-            'timestamps': result.get('timestamps', [])
+            'transcript': '',
+            'duration': 0,
+            'timestamps': [],
+            'transcriptJobId': job_id
         }
         lecture_id = firebase_service.add_uploaded_lecture(lecture_data)
+        if not lecture_id:
+            return jsonify({'success': False, 'message': '강의 저장 실패'})
         
-        # 임시 파일 삭제
-        os.remove(temp_video)
-        os.remove(temp_thumb)
+        job_service.submit('lecture_transcribe', {'lecture_id': lecture_id}, job_id=job_id, input_path=input_path)
+        input_path = None  # 이후 입력 파일은 작업이 관리
         
-        return jsonify({'success': True, 'lecture_id': lecture_id})
+        return jsonify({'success': True, 'lecture_id': lecture_id, 'job_id': job_id})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
+    finally:
+        # 임시 파일 삭제
+        for path in (input_path, temp_thumb):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def _run_lecture_job(input_path, params, progress):
+    """업로드 강의 전사 작업 (같은 영상이면 저장된 결과) → 강의 문서에 자막 반영"""
+    result = media_service.transcribe_file(input_path, on_progress=progress)
+    updated = firebase_service.update_lecture(params['lecture_id'], {
+        'transcript': result['transcript'],
+        'duration': result['duration'],
+        'timestamps': result['timestamps'].to_list()
+    })
+    if not updated:
+        raise RuntimeError(f"강의 자막 저장 실패: {params['lecture_id']}")
+    return {**media_service.encode_result(result), 'lecture_id': params['lecture_id']}
 
 
 @app.route('/api/lectures/delete', methods=['POST'])
@@ -646,10 +1070,11 @@ def set_offline_session():
         sessions[user_id] = {
             'video_id': 'offline_recording',
             'transcript': {'text': transcript},
+            'retriever': retrieval_service.get_retriever(transcript),
             'duration': 0,
             'title': '오프라인 강의 녹취록',
             'current_score': 0,
-            'conversation_history': []
+            'conversation': chat_service.ConversationMemory()
         }
         return jsonify({'success': True})
     except Exception as e:
@@ -670,10 +1095,11 @@ def set_lecture_session():
         sessions[user_id] = {
             'video_id': f'lecture_{lecture_id}',
             'transcript': {'text': transcript},
+            'retriever': retrieval_service.get_retriever(transcript),
             'duration': duration,
             'title': '',
             'current_score': 0,
-            'conversation_history': []
+            'conversation': chat_service.ConversationMemory()
         }
 
         return jsonify({'success': True})
@@ -887,6 +1313,39 @@ def scrap_community_post():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ==================== System API ====================
+@app.route('/api/system/stats', methods=['GET'])
+def get_system_stats():
+    """캐시 등 서버 내부 통계"""
+    return jsonify({
+        'success': True,
+        'cache': cache_service.get_stats(),
+        'single_flight': task_service.get_stats(),
+        'quiz_prefetch': quiz_service.prefetch_stats,
+        'chat_history': chat_service.history_stats,
+        'openai': openai_service.get_stats(),
+        'vad': vad_service.get_stats(),
+        'jobs': job_service.get_stats(),
+        'startup': {
+            'import_ms': STARTUP_TIMINGS,
+            'youtube_client_build_ms': youtube_service.client_build_ms
+        }
+    })
+
+
+# 비동기 작업 종류 등록 (부작용 없음, 어떤 실행 방식이든 import 시 등록)
+job_service.register('whisper_extract', _run_extract_job)
+job_service.register('lecture_transcribe', _run_lecture_job)
+
+
+def start_background_jobs():
+    """재시작 전 미완료 작업 복구 (요청을 처리하는 서버 프로세스에서 한 번만)"""
+    job_service.recover()
+
+
 if __name__ == '__main__':
     print("🚀 BISKIT POINT 백엔드 서버 시작...")
+    # 디버그 리로더의 감시용 부모 프로세스는 요청을 처리하지 않으므로 작업을 가져가지 않음
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
     app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,186 @@
+# backend/media_service.py
+import hashlib
+import os
+import tempfile
+from config import Config
+import cache_service
+from transcript_index import TranscriptIndex
+import whisper_service
+
+PROBE_BYTES = 8 * 1024 * 1024  # 앞부분 해시로 재업로드 후보를 미리 판단
+READ_BYTES = 1024 * 1024
+
+
+def encode_result(result):
+    """전사 결과 → JSON 직렬화 가능한 dict (timestamps는 리스트로)"""
+    return {**result, 'timestamps': result['timestamps'].to_list()}
+
+
+def _decode(data):
+    return {**data, 'timestamps': TranscriptIndex(data['timestamps'])}
+
+
+# 업로드 원본 SHA-256 → 전사 결과 (용량 초과 시 오래 안 쓴 항목부터 제거)
+transcript_store = cache_service.get_cache(
+    'media_transcript',
+    ttl=Config.MEDIA_STORE_TTL,
+    memory_items=Config.MEDIA_STORE_MEMORY_ITEMS,
+    memory_bytes=Config.MEDIA_STORE_MEMORY_MB * 1024 * 1024,
+    disk_bytes=Config.MEDIA_STORE_DISK_MB * 1024 * 1024,
+    encode=encode_result,
+    decode=_decode
+)
+
+# (앞부분 해시, 크기) → 전체 SHA-256 (스트리밍 업로드에서 ffmpeg 시작 전에 재업로드 여부 판단)
+probe_store = cache_service.get_cache(
+    'media_probe',
+    ttl=Config.MEDIA_STORE_TTL,
+    memory_items=Config.MEDIA_STORE_MEMORY_ITEMS
+)
+
+
+class HashingReader:
+    """읽는 동안 SHA-256을 계산하는 스트림 래퍼 (prefix는 이미 읽어 둔 앞부분)"""
+
+    def __init__(self, stream, prefix=b''):
+        self.stream = stream
+        self.hasher = hashlib.sha256(prefix)
+        self.size = len(prefix)
+        self._prefix = prefix
+
+    def read(self, size=-1):
+        # 앞부분은 이미 해시에 반영됨
+        if self._prefix:
+            if size is None or size < 0:
+                rest = self.stream.read()
+                self._update(rest)
+                data, self._prefix = self._prefix + rest, b''
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            return data
+
+        data = self.stream.read(size)
+        self._update(data)
+        return data
+
+    def _update(self, data):
+        self.hasher.update(data)
+        self.size += len(data)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def probe_key(head, size):
+    """앞부분 해시 + 전체 크기 (크기를 모르면 앞부분만)"""
+    return f"{hashlib.sha256(head).hexdigest()}:{size or ''}"
+
+
+def hash_file(path):
+    """파일 SHA-256 + 재업로드 판단용 probe 키"""
+    hasher = hashlib.sha256()
+    head = b''
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(READ_BYTES)
+            if not data:
+                break
+            if len(head) < PROBE_BYTES:
+                head += data[:PROBE_BYTES - len(head)]
+            hasher.update(data)
+    return hasher.hexdigest(), probe_key(head, os.path.getsize(path))
+
+
+def lookup(digest):
+    """저장된 전사 결과 (없으면 None)"""
+    result = transcript_store.get(digest)
+    if result is not None:
+        print(f"⚡ 동일 영상 전사 결과 재사용 ({digest[:12]})")
+    return result
+
+
+def store(digest, result, probe=None):
+    """완전한 전사 결과만 저장 (한 번 저장하면 같은 파일에는 계속 이 결과를 반환하므로)
+
+    failed_chunks가 있는 결과는 저장하지 않음. ffmpeg가 0이 아닌 코드로 끝나면 추출 함수
+    (extract_and_transcribe_file/stream, split_audio)가 예외를 내므로 저장까지 오지 않음
+    """
+    if result.get('failed_chunks'):
+        print(f"⚠️ 일부 구간 전사 실패 - 결과 저장 안 함 ({digest[:12]})")
+        return
+    transcript_store.set(digest, result)
+    if probe:
+        probe_store.set(probe, digest)
+
+
+def transcribe_file(path, on_progress=None):
+    """디스크의 업로드 파일 전사 (같은 내용이면 저장된 결과, on_progress는 collect_chunk_results 참고)"""
+    digest, probe = hash_file(path)
+    result = lookup(digest)
+    if result is None:
+        result = whisper_service.extract_and_transcribe_file(path, on_progress=on_progress)
+        store(digest, result, probe)
+    elif on_progress:
+        on_progress(1, 1, result['transcript'])
+    return result
+
+
+def transcribe_upload(video_file):
+    """multipart 업로드 전사 (임시 파일로 받으면서 해시 계산)"""
+    reader = HashingReader(video_file.stream)
+    head = b''
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+        while True:
+            data = reader.read(READ_BYTES)
+            if not data:
+                break
+            if len(head) < PROBE_BYTES:
+                head += data[:PROBE_BYTES - len(head)]
+            temp_video.write(data)
+        temp_path = temp_video.name
+
+    try:
+        digest = reader.hexdigest()
+        result = lookup(digest)
+        if result is None:
+            result = whisper_service.extract_and_transcribe_file(temp_path)
+            store(digest, result, probe_key(head, reader.size))
+        return result
+    finally:
+        os.unlink(temp_path)
+
+
+def transcribe_upload_stream(stream, size=None):
+    """스트리밍 업로드 전사 (해시는 받는 동안 계산)
+
+    앞부분(PROBE_BYTES)이 이전 업로드와 같으면 ffmpeg 없이 임시 파일로 받으며 전체 해시를 확인하고,
+    일치하면 저장된 결과를 반환. 처음 보는 영상은 스트리밍 추출/전사 후 결과 저장
+    """
+    head = whisper_service.read_exactly(stream, PROBE_BYTES)
+    probe = probe_key(head, size)
+    known = probe_store.get(probe)
+
+    if known is not None and transcript_store.get(known) is not None:
+        reader = HashingReader(stream, head)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+            while True:
+                data = reader.read(READ_BYTES)
+                if not data:
+                    break
+                temp_video.write(data)
+            temp_path = temp_video.name
+        try:
+            digest = reader.hexdigest()
+            result = lookup(digest)
+            if result is None:
+                # 앞부분만 같고 내용이 다른 경우
+                result = whisper_service.extract_and_transcribe_file(temp_path)
+                store(digest, result, probe)
+            return result
+        finally:
+            os.unlink(temp_path)
+
+    reader = HashingReader(stream, head)
+    result = whisper_service.extract_and_transcribe_stream(reader)
+    store(reader.hexdigest(), result, probe)
+    return result
@@ -0,0 +1,276 @@
+# backend/openai_service.py
+import random
+import threading
+import time
+from collections import deque
+import httpx
+import openai
+from openai import OpenAI
+from config import Config
+import scheduler_service
+from scheduler_service import scheduler
+import token_service
+
+# 재시도 대상 (타임아웃, 연결 실패, 429, 5xx)
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+# 작업별 기본 우선순위
+DEFAULT_PRIORITIES = {
+    'chat': 'chat',
+    'quiz': 'quiz',
+    'summary': 'summary',
+    'transcription': 'quiz'
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class OperationMetrics:
+    """작업 종류별 호출 통계 (대기 시간, 업스트림 지연은 최근 N건 기준)"""
+
+    def __init__(self, window=500):
+        self.attempts = 0
+        self.errors = 0
+        self.retries = 0
+        self.queue_waits = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, queue_wait=None, latency=None, error=False, retry=False):
+        with self._lock:
+            if queue_wait is not None:
+                self.attempts += 1
+                self.queue_waits.append(queue_wait)
+            if latency is not None:
+                self.latencies.append(latency)
+            if error:
+                self.errors += 1
+            if retry:
+                self.retries += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'errors': self.errors,
+                'retries': self.retries,
+                'queue_wait_ms': _summary(self.queue_waits),
+                'latency_ms': _summary(self.latencies)
+            }
+
+
+def _summary(samples):
+    if not samples:
+        return {'avg': 0, 'p50': 0, 'p95': 0, 'max': 0}
+    ordered = sorted(samples)
+    return {
+        'avg': round(sum(ordered) / len(ordered) * 1000, 1),
+        'p50': round(ordered[len(ordered) // 2] * 1000, 1),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        'max': round(ordered[-1] * 1000, 1)
+    }
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _get_metrics(operation):
+    with _metrics_lock:
+        if operation not in _metrics:
+            _metrics[operation] = OperationMetrics()
+        return _metrics[operation]
+
+
+def get_client():
+    """공유 OpenAI 클라이언트 (httpx 연결 풀 재사용, 재시도는 직접 처리)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE
+                    ),
+                    timeout=httpx.Timeout(Config.OPENAI_TIMEOUTS['chat'], connect=Config.OPENAI_CONNECT_TIMEOUT)
+                )
+                _client = OpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    http_client=http_client,
+                    max_retries=0
+                )
+    return _client
+
+
+def _timeout(operation):
+    """작업별 타임아웃 (연결은 짧게, 응답 대기는 작업 종류에 맞게)"""
+    seconds = Config.OPENAI_TIMEOUTS.get(operation, Config.OPENAI_TIMEOUTS['chat'])
+    return httpx.Timeout(seconds, connect=Config.OPENAI_CONNECT_TIMEOUT)
+
+
+def _estimate_tokens(kwargs):
+    """RPM/TPM 예약용 예상 토큰 (입력 메시지 + 최대 출력)"""
+    messages = kwargs.get('messages') or []
+    prompt = sum(token_service.count_tokens(m.get('content') or '') for m in messages)
+    return prompt + (kwargs.get('max_tokens') or Config.AI_MAX_TOKENS)
+
+
+def _acquire(operation, priority, tokens, deadline, rate_limited):
+    """스케줄러에서 실행 슬롯 획득 → 대기 시간(초)"""
+    started_at = time.perf_counter()
+    try:
+        scheduler.acquire(priority, tokens=tokens, deadline=deadline, rate_limited=rate_limited)
+    except scheduler_service.DeadlineExceeded:
+        _get_metrics(operation).record(error=True)
+        print(f"⏱️ OpenAI {operation} 요청 대기 마감 초과 - 실행하지 않음 ({priority})")
+        raise
+    return time.perf_counter() - started_at
+
+
+def _backoff(attempt, error):
+    """재시도 대기 시간 (Retry-After 우선, 없으면 지수 백오프 + full jitter)"""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), Config.OPENAI_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(Config.OPENAI_RETRY_MAX_DELAY, Config.OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _call(operation, create, kwargs, priority=None, deadline=None, rate_limited=True):
+    """슬롯 획득 후 재시도 포함 호출 → (응답, 호출 시작 시각, 예약 토큰)"""
+    metrics = _get_metrics(operation)
+    kwargs.setdefault('timeout', _timeout(operation))
+    priority = priority or DEFAULT_PRIORITIES.get(operation, 'chat')
+    if deadline is None:
+        deadline = time.monotonic() + Config.LLM_QUEUE_DEADLINES[priority]
+    tokens = _estimate_tokens(kwargs) if rate_limited else 0
+
+    for attempt in range(Config.OPENAI_MAX_RETRIES + 1):
+        metrics.record(queue_wait=_acquire(operation, priority, tokens, deadline, rate_limited))
+        started_at = time.perf_counter()
+        try:
+            response = create(**kwargs)
+            return response, started_at, tokens
+        except RETRYABLE_ERRORS as e:
+            # 실패한 시도의 예약 토큰은 돌려받음
+            scheduler.release(refund_tokens=tokens)
+            metrics.record(latency=time.perf_counter() - started_at)
+            if attempt == Config.OPENAI_MAX_RETRIES:
+                metrics.record(error=True)
+                raise
+            delay = _backoff(attempt, e)
+            print(f"🔁 OpenAI {operation} 재시도 {attempt + 1}/{Config.OPENAI_MAX_RETRIES} ({delay:.1f}초 후): {e}")
+            metrics.record(retry=True)
+            # 파일 업로드는 처음부터 다시 읽음
+            upload = kwargs.get('file')
+            if hasattr(upload, 'seek'):
+                upload.seek(0)
+            time.sleep(delay)
+        except Exception:
+            scheduler.release(refund_tokens=tokens)
+            metrics.record(latency=time.perf_counter() - started_at, error=True)
+            raise
+
+
+def chat_completion(operation='chat', priority=None, deadline=None, **kwargs):
+    """chat.completions.create (우선순위 스케줄링, 작업별 타임아웃, 재시도)
+
+    priority: scheduler_service.PRIORITIES 중 하나 (기본은 작업 종류별)
+    deadline: time.monotonic() 기준 대기 마감 (지나면 DeadlineExceeded)
+    """
+    response, started_at, tokens = _call(
+        operation, get_client().chat.completions.create, kwargs, priority, deadline
+    )
+    used = response.usage.total_tokens if getattr(response, 'usage', None) else tokens
+    scheduler.release(refund_tokens=tokens - used)
+    _get_metrics(operation).record(latency=time.perf_counter() - started_at)
+    return response
+
+
+def chat_completion_stream(operation='chat', priority=None, deadline=None, **kwargs):
+    """스트리밍 chat.completions.create (스트림을 닫을 때까지 슬롯 유지)"""
+    kwargs['stream'] = True
+    # 마지막 청크로 실제 사용량을 받아 예약 토큰 정산
+    kwargs.setdefault('stream_options', {'include_usage': True})
+    stream, started_at, tokens = _call(
+        operation, get_client().chat.completions.create, kwargs, priority, deadline
+    )
+    prompt_tokens = tokens - (kwargs.get('max_tokens') or Config.AI_MAX_TOKENS)
+    return ManagedStream(stream, operation, started_at, tokens, prompt_tokens)
+
+
+def transcribe(operation='transcription', priority=None, deadline=None, **kwargs):
+    """audio.transcriptions.create (업로드 파일은 재시도 시 처음부터 다시 전송, RPM/TPM 한도 제외)"""
+    response, started_at, _ = _call(
+        operation, get_client().audio.transcriptions.create, kwargs, priority, deadline,
+        rate_limited=False
+    )
+    scheduler.release()
+    _get_metrics(operation).record(latency=time.perf_counter() - started_at)
+    return response
+
+
+class ManagedStream:
+    """업스트림 스트림 래퍼 (종료/close 시 슬롯 반환 + 예약 토큰 정산 + 지연 기록)
+
+    사용량 청크를 받지 못하면 (중간에 끊긴 경우 등) 입력 예상 토큰 + 받은 출력 토큰으로 정산
+    """
+
+    def __init__(self, stream, operation, started_at, tokens=0, prompt_tokens=0):
+        self._stream = stream
+        self._operation = operation
+        self._started_at = started_at
+        self._tokens = tokens
+        self._prompt_tokens = prompt_tokens
+        self._used = None
+        self._content = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                if getattr(chunk, 'usage', None):
+                    self._used = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    self._content.append(chunk.choices[0].delta.content)
+                yield chunk
+        except Exception:
+            _get_metrics(self._operation).record(error=True)
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._stream.close()
+        finally:
+            used = self._used
+            if used is None:
+                used = self._prompt_tokens + token_service.count_tokens(''.join(self._content))
+            scheduler.release(refund_tokens=self._tokens - used)
+            _get_metrics(self._operation).record(latency=time.perf_counter() - self._started_at)
+
+
+def get_stats():
+    """작업별 호출 통계 + 스케줄러 상태"""
+    with _metrics_lock:
+        operations = dict(_metrics)
+    return {
+        'operations': {name: metrics.stats() for name, metrics in operations.items()},
+        'scheduler': scheduler.stats()
+    }
@@ -1,11 +1,54 @@
 # backend/quiz_service.py
-from openai import OpenAI
 import json
 import re
 import random
+import hashlib
+import threading
+from concurrent.futures import Future
 from config import Config
+import cache_service
+import openai_service
+import task_service
+import token_service
 
-client = OpenAI(api_key=Config.OPENAI_API_KEY)
+# 프롬프트를 바꾸면 올려서 기존 캐시를 무효화
+QUIZ_PROMPT_VERSION = 1
+
+QUIZ_SYSTEM_PROMPT = "당신은 교육 전문가입니다. 학생의 개념 이해도를 평가하는 고품질 퀴즈를 만듭니다."
+
+QUIZ_RULES = """
+[퀴즈 작성 규칙]
+1. **개념 이해 문제**: 단순 암기(숫자, 예시)가 아닌, 원리와 개념을 이해했는지 묻는 문제
+2. **응용/추론 문제**: "왜 그런가?", "어떤 상황에서?", "무엇의 역할은?" 형태
+3. **오답 함정**: 그럴듯하지만 틀린 선택지로 개념 혼동 유도
+4. **실무 연결**: 가능하면 실제 활용 사례와 연결
+
+[피해야 할 문제 유형]
+- ❌ "영상에서 예시로 든 숫자는?" (단순 암기)
+- ❌ "몇 개의 뉴런이 있는가?" (숫자 암기)  
+- ❌ "영상에서 보여준 이미지는?" (예시 암기)
+
+[좋은 문제 예시]
+- ✅ "신경망에서 활성화 함수가 필요한 이유는?"
+- ✅ "역전파 알고리즘이 해결하는 문제는?"
+- ✅ "은닉층의 뉴런 수를 늘리면 어떤 장단점이 있는가?"
+""".strip()
+
+quiz_cache = cache_service.get_cache(
+    'quiz',
+    ttl=Config.QUIZ_CACHE_TTL,
+    memory_items=Config.QUIZ_CACHE_MEMORY_ITEMS,
+    disk_bytes=Config.QUIZ_CACHE_DISK_MB * 1024 * 1024,
+    disk=Config.QUIZ_CACHE_DISK
+)
+
+# 미리 생성 중/완료된 퀴즈 (세션 키 -> {퀴즈 시간: Future}, 오래된 세션은 개수/TTL로 제거)
+_prefetched = cache_service.LRUCache(
+    max_items=Config.QUIZ_PREFETCH_SESSIONS,
+    ttl=Config.QUIZ_PREFETCH_TTL
+)
+_prefetch_lock = threading.Lock()
+prefetch_stats = {'scheduled': 0, 'hits': 0, 'misses': 0}
 
 
 def calculate_quiz_count(duration_seconds):
@@ -35,38 +78,100 @@ def calculate_quiz_times(duration, num_quizzes, skip_start=300):
     return sorted(list(set(quiz_times)))
 
 
-def generate_quiz_from_segment(transcript_text, num_quizzes=1):
+def select_quiz_context(transcript_text, index=None, current_time=0, max_tokens=None, duration=None):
+    """퀴즈 컨텍스트 선택 - current_time 직전 구간을 토큰 예산만큼
+
+    타임스탬프가 없으면 영상 길이 대비 위치로 텍스트를 잘라 그 직전 구간 사용 (길이를 모르면
+    말하기 속도로 추정). current_time이 없을 때만 전체 텍스트 뒤쪽 사용
+    """
+    max_tokens = max_tokens or Config.QUIZ_CONTEXT_TOKENS
+    if index is not None and len(index) and current_time > 0:
+        return index.window_before(current_time, max_tokens)
+
+    text = transcript_text or ''
+    if current_time > 0:
+        text = text[:_text_position(text, current_time, duration)]
+    text = token_service.truncate(text, max_tokens, from_end=True)
+    if not text:
+        # 영상 초반이라 잘린 텍스트가 없으면 앞부분 사용
+        text = token_service.truncate(transcript_text or '', max_tokens)
+    return {'text': text, 'tokens': token_service.count_tokens(text), 'start': None, 'end': None}
+
+
+def _text_position(text, current_time, duration=None):
+    """타임스탬프 없는 자막에서 current_time에 해당하는 글자 위치 (영상 길이 비례)"""
+    if duration and duration > 0:
+        return int(len(text) * min(1.0, current_time / duration))
+    return int(current_time * Config.SPEECH_CHARS_PER_SECOND)
+
+
+def generate_quiz_from_segment(transcript_text, num_quizzes=1, vary=None):
     """특정 구간 텍스트로 퀴즈 생성"""
+    quizzes, _ = generate_quiz_with_usage(transcript_text, num_quizzes, vary)
+    return quizzes
+
+
+def generate_quiz_with_usage(transcript_text, num_quizzes=1, vary=None, priority='quiz'):
+    """퀴즈 생성 + 토큰 사용량 (같은 구간/개수/모델/프롬프트면 캐시 사용)"""
     try:
-        # 텍스트 길이 제한
-        segmented_text = transcript_text[:2000]
-        
-        response = client.chat.completions.create(
-            model=Config.AI_MODEL,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "당신은 교육 전문가입니다. 학생의 개념 이해도를 평가하는 고품질 퀴즈를 만듭니다. JSON 배열만 반환하세요."
-                },
-                {
-                    "role": "user", 
-                    "content": f"""당신은 대학교 교수입니다. 아래 강의 내용을 바탕으로 학생의 **개념 이해도**를 평가하는 퀴즈를 {num_quizzes}개 만드세요.
+        segmented_text, key, pool, cached = _lookup_quiz_cache(transcript_text, num_quizzes, vary)
+        usage = {'context_tokens': token_service.count_tokens(segmented_text)}
+        if cached is not None:
+            usage.update(prompt_tokens=0, completion_tokens=0, cached=True)
+            return cached, usage
 
-[퀴즈 작성 규칙]
-1. **개념 이해 문제**: 단순 암기(숫자, 예시)가 아닌, 원리와 개념을 이해했는지 묻는 문제
-2. **응용/추론 문제**: "왜 그런가?", "어떤 상황에서?", "무엇의 역할은?" 형태
-3. **오답 함정**: 그럴듯하지만 틀린 선택지로 개념 혼동 유도
-4. **실무 연결**: 가능하면 실제 활용 사례와 연결
+        quizzes, api_usage = _request_quizzes(segmented_text, num_quizzes, priority)
+        usage.update(api_usage, cached=False)
+        quizzes = [quiz for quiz in quizzes if _is_valid_quiz(quiz)]
+        _cache_quizzes(key, pool, quizzes, num_quizzes)
+        return quizzes, usage
 
-[피해야 할 문제 유형]
-- ❌ "영상에서 예시로 든 숫자는?" (단순 암기)
-- ❌ "몇 개의 뉴런이 있는가?" (숫자 암기)  
-- ❌ "영상에서 보여준 이미지는?" (예시 암기)
+    except Exception as e:
+        print(f"❌ 퀴즈 생성 실패: {e}")
+        return [], None
 
-[좋은 문제 예시]
-- ✅ "신경망에서 활성화 함수가 필요한 이유는?"
-- ✅ "역전파 알고리즘이 해결하는 문제는?"
-- ✅ "은닉층의 뉴런 수를 늘리면 어떤 장단점이 있는가?"
+
+def _lookup_quiz_cache(transcript_text, num_quizzes, vary):
+    """토큰 예산 적용 후 캐시 조회 → (구간 텍스트, 키, 현재 풀, 캐시된 퀴즈 또는 None)"""
+    # 토큰 예산 제한 (최근 내용 우선)
+    segmented_text = token_service.truncate(transcript_text, Config.QUIZ_CONTEXT_TOKENS, from_end=True)
+
+    # vary=True면 키별로 최대 QUIZ_CACHE_POOL_SIZE개까지 서로 다른 퀴즈를 모아 무작위로 제공
+    vary = Config.QUIZ_CACHE_VARY if vary is None else vary
+    pool_size = Config.QUIZ_CACHE_POOL_SIZE if vary else 1
+
+    key = quiz_cache_key(segmented_text, num_quizzes)
+    pool = quiz_cache.get(key) or []
+    if len(pool) >= pool_size:
+        print(f"⚡ 퀴즈 캐시 사용 (풀 {len(pool)}개)")
+        return segmented_text, key, pool, (random.choice(pool) if vary else pool[0])
+    return segmented_text, key, pool, None
+
+
+def _cache_quizzes(key, pool, quizzes, num_quizzes):
+    """형식이 올바른 퀴즈가 요청 개수만큼 있을 때만 캐시 (모자란 결과가 오래 남지 않도록)"""
+    if len(quizzes) == num_quizzes:
+        quiz_cache.set(key, pool + [quizzes])
+
+
+def quiz_cache_key(segmented_text, num_quizzes):
+    """퀴즈 캐시 키 (구간 텍스트, 개수, 모델, 프롬프트 버전의 해시)"""
+    raw = json.dumps([segmented_text, num_quizzes, Config.AI_MODEL, QUIZ_PROMPT_VERSION], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _quiz_messages(segmented_text, num_quizzes):
+    """퀴즈 생성 프롬프트"""
+    return [
+        {
+            "role": "system", 
+            "content": QUIZ_SYSTEM_PROMPT + " JSON 배열만 반환하세요."
+        },
+        {
+            "role": "user", 
+            "content": f"""당신은 대학교 교수입니다. 아래 강의 내용을 바탕으로 학생의 **개념 이해도**를 평가하는 퀴즈를 {num_quizzes}개 만드세요.
+
+{QUIZ_RULES}
 
 [강의 내용]
 {segmented_text}
@@ -74,26 +179,311 @@ def generate_quiz_from_segment(transcript_text, num_quizzes=1):
 [출력 형식]
 JSON 배열로만 응답:
 [{{"question": "개념 이해를 묻는 질문", "options": ["선택지1", "선택지2", "선택지3", "선택지4"], "correct_answer": 0, "explanation": "정답인 이유와 관련 개념 설명"}}]"""
-                }
-            ],
-            temperature=Config.AI_TEMPERATURE,
-            max_tokens=Config.AI_MAX_TOKENS
+        }
+    ]
+
+
+def _request_quizzes(segmented_text, num_quizzes, priority='quiz'):
+    """OpenAI로 퀴즈 생성 후 JSON 파싱"""
+    response = openai_service.chat_completion(
+        'quiz',
+        priority=priority,
+        model=Config.AI_MODEL,
+        messages=_quiz_messages(segmented_text, num_quizzes),
+        temperature=Config.AI_TEMPERATURE,
+        max_tokens=Config.AI_MAX_TOKENS
+    )
+    
+    content = response.choices[0].message.content
+    print(f"📝 AI 응답:\n{content[:200]}...")
+
+    usage = {}
+    if response.usage:
+        usage = {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens
+        }
+
+    return _parse_quizzes(content), usage
+
+
+def _parse_quizzes(content):
+    """응답 텍스트에서 퀴즈 JSON 배열 추출"""
+    match = re.search(r'\[.*\]', content, re.DOTALL)
+    if match:
+        content = match.group(0).strip()
+    
+    quizzes = json.loads(content)
+    return quizzes if isinstance(quizzes, list) else [quizzes]
+
+
+def stream_quizzes(transcript_text, num_quizzes=1, vary=None):
+    """퀴즈를 스트리밍으로 생성해 완성된 퀴즈 객체부터 바로 yield (캐시 적중 시 캐시에서)"""
+    segmented_text, key, pool, cached = _lookup_quiz_cache(transcript_text, num_quizzes, vary)
+    if cached is not None:
+        yield from cached
+        return
+
+    stream = openai_service.chat_completion_stream(
+        'quiz',
+        model=Config.AI_MODEL,
+        messages=_quiz_messages(segmented_text, num_quizzes),
+        temperature=Config.AI_TEMPERATURE,
+        max_tokens=Config.AI_MAX_TOKENS
+    )
+
+    parser = QuizStreamParser()
+    content = []
+    quizzes = []
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            content.append(delta)
+            for quiz in parser.feed(delta):
+                # 형식이 잘못된 객체는 보내지 않음
+                if not _is_valid_quiz(quiz):
+                    continue
+                quizzes.append(quiz)
+                yield quiz
+    finally:
+        # 클라이언트가 중간에 끊어도 업스트림 연결은 정리
+        stream.close()
+
+    if not quizzes:
+        # 배열 형식이 아니었으면 전체 응답으로 한 번 더 파싱
+        quizzes = [quiz for quiz in _parse_quizzes(''.join(content)) if _is_valid_quiz(quiz)]
+        yield from quizzes
+
+    # max_tokens에서 끊겨 개수가 모자라면 캐시하지 않음
+    _cache_quizzes(key, pool, quizzes, num_quizzes)
+
+
+class QuizStreamParser:
+    """스트리밍 응답에서 JSON 배열 안의 객체를 완성되는 대로 꺼내는 증분 파서"""
+
+    def __init__(self):
+        self._started = False  # '[' 를 만났는지
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+
+    def feed(self, chunk):
+        """청크를 넣고 이번에 완성된 객체 목록 반환"""
+        objects = []
+        for ch in chunk:
+            if not self._started:
+                self._started = ch == '['
+                continue
+
+            if self._depth == 0:
+                # 객체 사이의 쉼표/공백/닫는 괄호는 무시
+                if ch == '{':
+                    self._depth = 1
+                    self._buffer = [ch]
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = ''.join(self._buffer)
+                    self._buffer = []
+                    try:
+                        objects.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        print(f"❌ 퀴즈 객체 파싱 실패: {e}")
+        return objects
+
+
+def generate_quizzes_batch(segments, num_quizzes=1, priority='quiz'):
+    """여러 구간의 퀴즈를 구조화된 LLM 호출 한 번으로 생성
+
+    segments: {퀴즈 시간: 구간 텍스트} → {퀴즈 시간: (퀴즈 목록, 사용량)}
+    캐시에 있는 구간은 제외하고, 결과가 잘못된 구간만 개별 재시도
+    """
+    results = {}
+    pending = []  # (퀴즈 시간, 구간 텍스트, 캐시 키, 현재 풀)
+    for quiz_time, text in segments.items():
+        segmented_text, key, pool, cached = _lookup_quiz_cache(text, num_quizzes, None)
+        if cached is not None:
+            results[quiz_time] = (cached, {'context_tokens': token_service.count_tokens(segmented_text),
+                                           'prompt_tokens': 0, 'completion_tokens': 0, 'cached': True})
+        elif segmented_text.strip():
+            pending.append((quiz_time, segmented_text, key, pool))
+        else:
+            results[quiz_time] = ([], None)
+
+    retries = {}
+    for i in range(0, len(pending), Config.QUIZ_BATCH_SIZE):
+        batch = pending[i:i + Config.QUIZ_BATCH_SIZE]
+        try:
+            parsed, usage = _request_quiz_batch([text for _, text, _, _ in batch], num_quizzes, priority)
+        except Exception as e:
+            print(f"❌ 일괄 퀴즈 생성 실패: {e}")
+            parsed, usage = {}, {}
+
+        for position, (quiz_time, text, key, pool) in enumerate(batch):
+            quizzes = [q for q in parsed.get(position, []) if _is_valid_quiz(q)][:num_quizzes]
+            if quizzes:
+                _cache_quizzes(key, pool, quizzes, num_quizzes)
+                results[quiz_time] = (quizzes, {**usage, 'batch_size': len(batch), 'cached': False})
+            else:
+                # 누락/형식 오류 구간은 개별 호출로 병렬 재시도
+                retries[quiz_time] = task_service.submit(
+                    generate_quiz_with_usage, text, num_quizzes, priority=priority
+                )
+
+    for quiz_time, future in retries.items():
+        print(f"🔁 퀴즈 개별 재시도: {quiz_time}초")
+        results[quiz_time] = task_service.wait_result(
+            future, Config.QUIZ_PREFETCH_WAIT, default=([], None), label='퀴즈 재시도'
         )
-        
-        content = response.choices[0].message.content
-        print(f"📝 AI 응답:\n{content[:200]}...")
-
-        # JSON 추출
-        match = re.search(r'\[.*\]', content, re.DOTALL)
-        if match:
-            content = match.group(0).strip()
-        
-        quizzes = json.loads(content)
-        return quizzes if isinstance(quizzes, list) else [quizzes]
 
-    except Exception as e:
-        print(f"❌ 퀴즈 생성 실패: {e}")
-        return []
+    return results
+
+
+def _request_quiz_batch(texts, num_quizzes, priority='quiz'):
+    """구간 목록으로 한 번에 퀴즈 생성 → ({구간 번호(0부터): 퀴즈 목록}, 사용량)"""
+    sections = '\n\n'.join(f"[구간 {i + 1}]\n{text}" for i, text in enumerate(texts))
+    response = openai_service.chat_completion(
+        'quiz',
+        priority=priority,
+        model=Config.AI_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": QUIZ_SYSTEM_PROMPT + " JSON 객체만 반환하세요."
+            },
+            {
+                "role": "user",
+                "content": f"""당신은 대학교 교수입니다. 아래 강의의 각 구간마다 학생의 **개념 이해도**를 평가하는 퀴즈를 {num_quizzes}개씩 만드세요.
+각 퀴즈는 해당 구간의 내용만으로 풀 수 있어야 합니다.
+
+{QUIZ_RULES}
+
+[강의 구간]
+{sections}
+
+[출력 형식]
+JSON 객체로만 응답 (segment는 구간 번호):
+{{"quizzes": [{{"segment": 1, "question": "개념 이해를 묻는 질문", "options": ["선택지1", "선택지2", "선택지3", "선택지4"], "correct_answer": 0, "explanation": "정답인 이유와 관련 개념 설명"}}]}}"""
+            }
+        ],
+        response_format={"type": "json_object"},
+        temperature=Config.AI_TEMPERATURE,
+        max_tokens=min(4096, Config.QUIZ_BATCH_TOKENS_PER_QUIZ * num_quizzes * len(texts))
+    )
+
+    usage = {}
+    if response.usage:
+        usage = {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens
+        }
+
+    parsed = {}
+    items = json.loads(response.choices[0].message.content).get('quizzes', [])
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            position = int(item.pop('segment')) - 1
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= position < len(texts):
+            parsed.setdefault(position, []).append(item)
+    return parsed, usage
+
+
+def _is_valid_quiz(quiz):
+    """퀴즈 형식 검증 (질문, 선택지 2개 이상, 정답 번호, 해설)"""
+    if not isinstance(quiz, dict):
+        return False
+    options = quiz.get('options')
+    answer = quiz.get('correct_answer')
+    return (
+        isinstance(quiz.get('question'), str) and quiz['question'].strip() != '' and
+        isinstance(options, list) and len(options) >= 2 and
+        all(isinstance(option, str) for option in options) and
+        isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(options) and
+        isinstance(quiz.get('explanation', ''), str)
+    )
+
+
+def prefetch_quizzes(session_key, segments, num_quizzes=1):
+    """스케줄된 시간별 퀴즈를 백그라운드에서 한 번의 일괄 호출로 미리 생성 (segments: {퀴즈 시간: 구간 텍스트})"""
+    futures = {quiz_time: Future() for quiz_time in segments}
+
+    def run():
+        # 취소되지 않은 시간만 생성
+        active = {t: f for t, f in futures.items() if f.set_running_or_notify_cancel()}
+        if not active:
+            return
+        try:
+            # 미리 생성은 백그라운드 우선순위 (채팅/즉시 퀴즈 요청에 밀림)
+            results = generate_quizzes_batch(
+                {t: segments[t] for t in active}, num_quizzes, priority='background'
+            )
+        except Exception as e:
+            print(f"❌ 퀴즈 미리 생성 실패: {e}")
+            results = {}
+        for quiz_time, future in active.items():
+            future.set_result(results.get(quiz_time, ([], None)))
+
+    with _prefetch_lock:
+        previous = _prefetched.get(session_key) or {}
+        _prefetched.set(session_key, {'num_quizzes': num_quizzes, 'futures': futures})
+        prefetch_stats['scheduled'] += len(futures)
+
+    # 이전 스케줄 중 아직 시작하지 않은 작업은 취소
+    for future in previous.get('futures', {}).values():
+        future.cancel()
+
+    task_service.submit(run, pool='quiz_prefetch')
+
+
+def take_prefetched_quiz(session_key, current_time, num_quizzes=1):
+    """현재 시간에 해당하는 미리 생성된 퀴즈 꺼내기 → (퀴즈, 사용량), 없으면 (None, None)"""
+    with _prefetch_lock:
+        entry = _prefetched.get(session_key)
+        future = None
+        if entry and entry['num_quizzes'] == num_quizzes and entry['futures']:
+            nearest = min(entry['futures'], key=lambda t: abs(t - current_time))
+            if abs(nearest - current_time) <= Config.QUIZ_PREFETCH_TOLERANCE:
+                future = entry['futures'].pop(nearest)
+            # 다 꺼낸 세션은 바로 제거
+            if not entry['futures']:
+                _prefetched.delete(session_key)
+
+    quizzes, usage = None, None
+    # 아직 작업 풀 대기열에 있으면 취소하고 바로 새로 생성, 생성 중이면 잠깐만 기다림
+    # (업스트림 대기열에서 밀려 있을 수 있으므로 오래 기다리지 않음)
+    if future is not None and not future.cancel():
+        quizzes, usage = task_service.wait_result(
+            future, Config.QUIZ_PREFETCH_WAIT, default=([], None), label='퀴즈 미리 생성'
+        )
+
+    with _prefetch_lock:
+        prefetch_stats['hits' if quizzes else 'misses'] += 1
+    if not quizzes:
+        return None, None
+    return quizzes, usage
 
 
 def check_answer(user_answer, correct_answer):
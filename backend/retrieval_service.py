@@ -0,0 +1,136 @@
+# backend/retrieval_service.py
+import hashlib
+import re
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from cache_service import LRUCache
+from config import Config
+import token_service
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """검색용 토큰화 (영문/숫자는 단어, 한글 등은 문자 2-gram → 조사가 붙어도 매칭)"""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word.isascii() or len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def chunk_transcript(text, index=None, max_tokens=None):
+    """자막을 청크로 분할 (타임스탬프가 있으면 세그먼트 경계 기준)"""
+    max_tokens = max_tokens or Config.CHAT_CHUNK_TOKENS
+
+    if index is not None and len(index):
+        prefix = index.cumulative_tokens()
+        bounds = []
+        first = 0
+        for i in range(1, len(index)):
+            if prefix[i + 1] - prefix[first] > max_tokens:
+                bounds.append((first, i))
+                first = i
+        bounds.append((first, len(index)))
+
+        return [{
+            'text': index.segments_text(first, last),
+            'start': index.starts[first],
+            'end': index.ends[last - 1],
+            'tokens': prefix[last] - prefix[first]
+        } for first, last in bounds]
+
+    # 타임스탬프가 없으면 단어 경계에서 토큰 예산만큼 자름
+    chunks = []
+    words = []
+    tokens = 0
+    for word in text.split():
+        word_tokens = token_service.count_tokens(word + ' ')
+        if words and tokens + word_tokens > max_tokens:
+            chunks.append({'text': ' '.join(words), 'start': None, 'end': None, 'tokens': tokens})
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        chunks.append({'text': ' '.join(words), 'start': None, 'end': None, 'tokens': tokens})
+    return chunks
+
+
+class TranscriptRetriever:
+    """자막 청크 BM25 검색기 (세션 로드 시 1회 생성, 질문마다 희소 행렬 연산으로 점수 계산)"""
+
+    def __init__(self, chunks, k1=None, b=None):
+        k1 = Config.BM25_K1 if k1 is None else k1
+        b = Config.BM25_B if b is None else b
+
+        self.chunks = chunks
+        self.vocab = {}
+
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk['text']))
+            lengths[i] = sum(terms.values())
+            for term, count in terms.items():
+                rows.append(i)
+                cols.append(self.vocab.setdefault(term, len(self.vocab)))
+                counts.append(count)
+
+        rows = np.array(rows, dtype=np.int32)
+        cols = np.array(cols, dtype=np.int32)
+        tf = np.array(counts, dtype=np.float32)
+
+        # BM25 가중치를 미리 계산해 (청크 x 단어) 희소 행렬로 저장
+        n = len(chunks)
+        df = np.bincount(cols, minlength=len(self.vocab))
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = lengths.mean() if n else 1.0
+        norm = k1 * (1 - b + b * lengths[rows] / max(avgdl, 1.0))
+        weights = idf[cols] * tf * (k1 + 1) / (tf + norm)
+
+        self.matrix = sparse.csc_matrix((weights, (rows, cols)), shape=(n, len(self.vocab)))
+
+    def search(self, query, max_tokens=None, top_k=None):
+        """질문과 관련된 청크를 토큰 예산 안에서 선택 (시간 순 정렬)"""
+        max_tokens = max_tokens or Config.CHAT_CONTEXT_TOKENS
+        top_k = top_k or Config.CHAT_TOP_K
+
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids:
+            return []
+
+        scores = np.asarray(self.matrix[:, term_ids].sum(axis=1)).ravel()
+        ranked = np.argsort(-scores)[:top_k]
+
+        selected = []
+        used = 0
+        for i in ranked:
+            if scores[i] <= 0:
+                break
+            chunk = self.chunks[i]
+            if used + chunk['tokens'] > max_tokens:
+                continue
+            selected.append((int(i), float(scores[i])))
+            used += chunk['tokens']
+
+        return [{**self.chunks[i], 'score': round(score, 3)} for i, score in sorted(selected)]
+
+
+# 같은 자막의 검색기는 여러 사용자가 공유
+_retriever_cache = LRUCache(max_items=128, ttl=Config.TRANSCRIPT_CACHE_TTL)
+
+
+def get_retriever(text, index=None, key=None):
+    """세션용 검색기 생성/조회 (key가 없으면 자막 원문 해시 기준)"""
+    if not text:
+        return None
+
+    key = key or 'text:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+    retriever = _retriever_cache.get(key)
+    if retriever is None:
+        retriever = TranscriptRetriever(chunk_transcript(text, index))
+        _retriever_cache.set(key, retriever)
+    return retriever
@@ -0,0 +1,157 @@
+# backend/scheduler_service.py
+import heapq
+import itertools
+import threading
+import time
+from config import Config
+
+# 우선순위 (작을수록 먼저): 실시간 채팅 > 사용자가 기다리는 퀴즈 > 요약 > 백그라운드(미리 생성, 대화 요약)
+PRIORITIES = {
+    'chat': 0,
+    'quiz': 1,
+    'summary': 2,
+    'background': 3
+}
+
+
+class DeadlineExceeded(Exception):
+    """대기 중 마감 시간이 지나 실행하지 않고 버린 요청"""
+
+
+class TokenBucket:
+    """토큰 버킷 (분당 한도를 초 단위로 채움)"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, now):
+        """amount를 꺼낼 수 있을 때까지 남은 시간 (초)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # 한도보다 큰 요청도 가득 찼을 때는 통과
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        self.available = min(self.capacity, self.available + amount)
+
+
+class PriorityScheduler:
+    """업스트림 요청 입장 관리
+
+    동시 실행 수 + RPM/TPM 토큰 버킷을 만족할 때 우선순위가 가장 높은 요청부터 실행하고,
+    대기 중 마감 시간이 지난 요청은 실행하지 않고 버림. 같은 한도를 두고 다투는 요청끼리만
+    순서를 지키므로, 한도 제외 요청(전사)은 토큰 충전을 기다리는 요청 뒤에서 기다리지 않음
+    """
+
+    def __init__(self, max_in_flight, rpm, tpm):
+        self.max_in_flight = max_in_flight
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.in_flight = 0
+        self._queue = []  # (우선순위, 순번, 요청)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self.dropped = {name: 0 for name in PRIORITIES}
+        self.admitted = {name: 0 for name in PRIORITIES}
+
+    def acquire(self, priority='chat', tokens=0, deadline=None, rate_limited=True):
+        """실행 슬롯 획득 (deadline은 time.monotonic() 기준, 지나면 DeadlineExceeded)"""
+        if deadline is None:
+            deadline = time.monotonic() + Config.LLM_QUEUE_DEADLINES[priority]
+
+        entry = [PRIORITIES[priority], next(self._sequence), tokens if rate_limited else 0, rate_limited]
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        self.dropped[priority] += 1
+                        raise DeadlineExceeded(f"{priority} 요청 대기 마감 초과")
+
+                    wait = self._admission_wait(entry, now)
+                    if wait == 0:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self.in_flight += 1
+                        if rate_limited:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                        self.admitted[priority] += 1
+                        # 다음 대기 요청도 바로 입장할 수 있는지 확인하도록 깨움
+                        self._cond.notify_all()
+                        return
+
+                    self._cond.wait(timeout=min(wait, deadline - now))
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def _admission_wait(self, entry, now):
+        """entry가 입장하기까지 기다릴 시간 (0이면 즉시 입장, 순서/슬롯 대기면 알림까지)
+
+        앞선 요청이 지금 입장 가능하면 슬롯을 양보하고, 둘 다 RPM/TPM 한도 대상이면
+        앞선 요청이 토큰을 기다리는 동안에도 순서를 지킴
+        """
+        for other in self._queue:
+            if other is entry or other[:2] > entry[:2]:
+                continue
+            if (other[3] and entry[3]) or self._bucket_wait(other, now) == 0:
+                return 1.0  # release/acquire 시 notify로 깨어남
+        if self.in_flight >= self.max_in_flight:
+            return 1.0
+        return self._bucket_wait(entry, now)
+
+    def _bucket_wait(self, entry, now):
+        """RPM/TPM 버킷만 기준으로 기다릴 시간 (한도 제외 요청은 0)"""
+        _, _, tokens, rate_limited = entry
+        if not rate_limited:
+            return 0.0
+        return max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    def release(self, refund_tokens=0):
+        """슬롯 반환 (예상보다 적게 쓴 토큰은 돌려받음)"""
+        with self._cond:
+            self.in_flight -= 1
+            if refund_tokens > 0:
+                self.tokens.refund(refund_tokens)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            waiting = {name: 0 for name in PRIORITIES}
+            names = {level: name for name, level in PRIORITIES.items()}
+            for level, _, _, _ in self._queue:
+                waiting[names[level]] += 1
+            return {
+                'in_flight': self.in_flight,
+                'waiting': waiting,
+                'admitted': dict(self.admitted),
+                'dropped': dict(self.dropped),
+                'rpm_available': int(self.requests.available),
+                'tpm_available': int(self.tokens.available)
+            }
+
+
+scheduler = PriorityScheduler(
+    max_in_flight=Config.OPENAI_MAX_IN_FLIGHT,
+    rpm=Config.LLM_RPM,
+    tpm=Config.LLM_TPM
+)
@@ -0,0 +1,114 @@
+# backend/task_service.py
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import Config
+
+# 이름별 공유 스레드 풀 (용도별로 분리해 중첩 제출 시 교착을 방지)
+_executors = {}
+_registry_lock = threading.Lock()
+
+
+# 풀별 기본 크기
+POOL_SIZES = {
+    'io': Config.IO_POOL_SIZE,
+    'quiz_prefetch': Config.QUIZ_PREFETCH_WORKERS,
+    'chat_summary': Config.CHAT_SUMMARY_WORKERS,
+    'summary': Config.SUMMARY_WORKERS,
+    'transcription': Config.TRANSCRIBE_WORKERS,
+    'jobs': Config.JOB_WORKERS
+}
+
+
+def get_executor(name='io', max_workers=None):
+    """이름별 공유 스레드 풀 생성/조회"""
+    with _registry_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers or POOL_SIZES.get(name, Config.IO_POOL_SIZE),
+                thread_name_prefix=f'biskit-{name}'
+            )
+        return _executors[name]
+
+
+def submit(fn, *args, pool='io', **kwargs):
+    """공유 풀에 작업 제출"""
+    return get_executor(pool).submit(fn, *args, **kwargs)
+
+
+def wait_result(future, timeout, default=None, label='작업'):
+    """타임아웃 내 결과 반환, 초과/실패 시 기본값"""
+    try:
+        return future.result(timeout=max(0, timeout))
+    except FutureTimeoutError:
+        print(f"⏱️ {label} 시간 초과 ({timeout:.1f}초) - 기본값 사용")
+        return default
+    except Exception as e:
+        print(f"❌ {label} 실패: {e}")
+        return default
+
+
+def remaining(started_at, timeout):
+    """시작 시각 기준 남은 타임아웃 (초)"""
+    return timeout - (time.perf_counter() - started_at)
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 한 번의 실행으로 합침 (첫 호출자가 실행, 나머지는 결과 공유)"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
+
+
+# 등록된 single-flight 목록 (통계 조회용)
+_flights = {}
+
+
+def get_single_flight(name):
+    """이름별 SingleFlight 생성/조회"""
+    with _registry_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def get_stats():
+    """single-flight 통계"""
+    return {name: flight.stats() for name, flight in _flights.items()}
@@ -0,0 +1,62 @@
+# backend/token_service.py
+import threading
+from config import Config
+
+# tiktoken 인코딩은 첫 사용 시 로드
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """모델 토크나이저 (tiktoken 사용 불가 시 None → 근사치 사용)"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    try:
+                        _encoding = tiktoken.encoding_for_model(Config.AI_MODEL)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding('cl100k_base')
+                except Exception as e:
+                    print(f"⚠️ tiktoken 로드 실패, 토큰 수 근사치 사용: {e}")
+                    _encoding_failed = True
+    return _encoding
+
+
+def _estimate(text):
+    """tiktoken이 없을 때 근사치 (한글 등은 글자당 약 1토큰, ASCII는 4글자당 1토큰)"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def count_tokens(text):
+    """텍스트 토큰 수"""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return _estimate(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate(text, max_tokens, from_end=False):
+    """토큰 예산에 맞게 자르기 (from_end=True면 뒤쪽을 남김)"""
+    if not text or max_tokens <= 0:
+        return ""
+
+    encoding = get_encoding()
+    if encoding is None:
+        total = _estimate(text)
+        if total <= max_tokens:
+            return text
+        keep = int(len(text) * max_tokens / total)
+        return text[-keep:] if from_end else text[:keep]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    kept = tokens[-max_tokens:] if from_end else tokens[:max_tokens]
+    return encoding.decode(kept)
@@ -0,0 +1,150 @@
+# backend/transcript_index.py
+import hashlib
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from cache_service import LRUCache
+from config import Config
+import token_service
+
+
+class TranscriptIndex:
+    """타임스탬프 자막 컨테이너 + 인덱스
+
+    세그먼트를 dict 리스트 대신 열 단위(array)로 저장하고 텍스트는 하나의 문자열에
+    오프셋으로 보관해 메모리를 줄이며, 시간 구간 텍스트는 이분 탐색 + 슬라이스 한 번으로 조회
+    """
+
+    __slots__ = ('starts', 'ends', 'max_ends', 'offsets', 'text', 'token_prefix')
+
+    def __init__(self, timestamps):
+        self.starts = array('d')
+        self.ends = array('d')
+        self.max_ends = array('d')  # ends의 누적 최댓값 (정렬 보장 → 이분 탐색용)
+        self.offsets = array('q', [0])  # 세그먼트 i의 텍스트 시작 위치, 마지막은 len(text) + 1
+
+        parts = []
+        running_max = float('-inf')
+        position = 0
+        for seg in timestamps:
+            text = seg.get('text', '')
+            running_max = max(running_max, seg['end'])
+
+            self.starts.append(seg['start'])
+            self.ends.append(seg['end'])
+            self.max_ends.append(running_max)
+            parts.append(text)
+
+            position += len(text) + 1  # 공백 구분자 포함
+            self.offsets.append(position)
+
+        self.text = ' '.join(parts)
+        self.token_prefix = None  # 세그먼트별 누적 토큰 수 (첫 토큰 예산 조회 시 생성)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for i in range(len(self.starts)):
+            yield self.segment(i)
+
+    def segment(self, i):
+        """i번째 세그먼트 (기존 dict 형태)"""
+        return {
+            'start': self.starts[i],
+            'end': self.ends[i],
+            'text': self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+        }
+
+    def to_list(self):
+        """API 응답용 [{'start', 'end', 'text'}] 리스트"""
+        return list(self)
+
+    def nbytes(self):
+        """저장에 사용 중인 대략적인 메모리 (바이트)"""
+        arrays = [self.starts, self.ends, self.max_ends, self.offsets]
+        if self.token_prefix is not None:
+            arrays.append(self.token_prefix)
+        return sum(sys.getsizeof(a) for a in arrays) + sys.getsizeof(self.text)
+
+    def _first_ending_after(self, t):
+        """end > t 인 첫 세그먼트 위치"""
+        return bisect_right(self.max_ends, t)
+
+    def _cut(self, t):
+        """t 시점까지 포함할 세그먼트 개수 (걸쳐 있는 세그먼트 1개 포함)"""
+        k = self._first_ending_after(t)
+        if k < len(self.starts) and self.starts[k] < t:
+            k += 1
+        return k
+
+    def segments_text(self, first, last):
+        """first ~ last-1 번째 세그먼트 텍스트"""
+        if last <= first:
+            return ""
+        return self.text[self.offsets[first]:self.offsets[last] - 1]
+
+    def text_until(self, current_time):
+        """처음부터 current_time까지의 텍스트"""
+        return self.segments_text(0, self._cut(current_time))
+
+    def text_between(self, start_time, end_time):
+        """start_time ~ end_time 구간의 텍스트"""
+        return self.segments_text(self._first_ending_after(start_time), self._cut(end_time))
+
+    def cumulative_tokens(self):
+        """세그먼트별 누적 토큰 수 (길이 len + 1, 첫 호출 시 1회 계산)"""
+        if self.token_prefix is None:
+            prefix = array('q', [0])
+            total = 0
+            for i in range(len(self.starts)):
+                total += token_service.count_tokens(self.segments_text(i, i + 1))
+                prefix.append(total)
+            self.token_prefix = prefix
+        return self.token_prefix
+
+    def window_before(self, current_time, max_tokens):
+        """current_time 직전 구간을 토큰 예산 안에서 최대한 길게 선택"""
+        last = self._cut(current_time)
+        if last == 0:
+            return {'text': '', 'tokens': 0, 'start': 0, 'end': 0}
+
+        prefix = self.cumulative_tokens()
+        first = bisect_left(prefix, prefix[last] - max_tokens, 0, last)
+
+        if first == last:
+            # 마지막 세그먼트 하나가 예산보다 길면 뒤쪽만 사용
+            first = last - 1
+            text = token_service.truncate(self.segments_text(first, last), max_tokens, from_end=True)
+            tokens = min(max_tokens, prefix[last] - prefix[first])
+        else:
+            text = self.segments_text(first, last)
+            tokens = prefix[last] - prefix[first]
+
+        return {
+            'text': text,
+            'tokens': tokens,
+            'start': self.starts[first],
+            'end': self.ends[last - 1]
+        }
+
+
+# 같은 자막의 인덱스는 여러 사용자가 공유
+_index_cache = LRUCache(max_items=256, ttl=Config.TRANSCRIPT_CACHE_TTL)
+
+
+def get_index(timestamps, key=None):
+    """인덱스 생성/조회 (key가 없으면 생성만)"""
+    if key is None:
+        return TranscriptIndex(timestamps)
+
+    index = _index_cache.get(key)
+    if index is None:
+        index = TranscriptIndex(timestamps)
+        _index_cache.set(key, index)
+    return index
+
+
+def text_key(text):
+    """자막 원문 기반 인덱스 키"""
+    return 'text:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
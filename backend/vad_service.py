@@ -0,0 +1,105 @@
+# backend/vad_service.py
+import subprocess
+import threading
+import numpy as np
+from config import Config
+
+SAMPLE_RATE = 16000
+WEBM_MAGIC = b'\x1a\x45\xdf\xa3'  # EBML 헤더
+WEBM_CLUSTER = b'\x1f\x43\xb6\x75'  # Cluster 요소 ID
+
+vad_stats = {'checked': 0, 'skipped': 0, 'errors': 0}
+_stats_lock = threading.Lock()
+
+
+def webm_tail(data, tail_bytes):
+    """누적 webm 녹음에서 헤더 + 끝쪽 클러스터만 잘라낸 webm (잘라낼 수 없으면 원본)
+
+    파이프 입력은 -sseof로 끝에서부터 읽을 수 없으므로 바이트 단위로 자름.
+    끝에서 tail_bytes 지점 직전의 클러스터부터 사용해 녹음 길이와 관계없이 디코딩 비용 일정
+    """
+    if not data.startswith(WEBM_MAGIC) or len(data) <= tail_bytes:
+        return data
+    header_end = data.find(WEBM_CLUSTER)
+    if header_end <= 0:
+        return data
+    start = data.rfind(WEBM_CLUSTER, header_end, len(data) - tail_bytes)
+    if start <= header_end:
+        return data
+    return data[:header_end] + data[start:]
+
+
+def decode_pcm(data, window_seconds=None):
+    """오디오 바이트 → 16kHz 모노 float32 PCM (ffmpeg 파이프, 끝에서 window_seconds만)"""
+    command = ['ffmpeg', '-i', 'pipe:0', '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', 'pipe:1']
+    result = subprocess.run(command, input=data, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-200:].decode('utf-8', 'replace'))
+
+    samples = np.frombuffer(result.stdout, dtype=np.int16)
+    if window_seconds:
+        samples = samples[-int(window_seconds * SAMPLE_RATE):]
+    return samples.astype(np.float32) / 32768.0
+
+
+def speech_ratio(samples):
+    """음성으로 판단된 프레임 비율
+
+    프레임별 RMS(dBFS)가 절대 임계값(VAD_ENERGY_DB)보다 크고,
+    클립 내 소음 바닥(하위 10% 에너지)보다 VAD_SNR_DB 이상 큰 프레임을 음성으로 간주
+    """
+    frame = int(SAMPLE_RATE * Config.VAD_FRAME_MS / 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return 0.0
+
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+
+    noise_floor = np.percentile(db, 10)
+    speech = (db > Config.VAD_ENERGY_DB) & (db > noise_floor + Config.VAD_SNR_DB)
+    return float(np.mean(speech))
+
+
+def has_speech(data, since_seconds=None):
+    """Whisper 호출 전 음성 여부 확인 (판단 불가 시 True → 전사 진행)
+
+    since_seconds: 마지막 전사 이후 녹음에 추가된 길이. 기본 검사 구간보다 길면 그만큼 검사하고,
+    VAD_MAX_WINDOW_SECONDS보다 길면 검사 없이 전사 (놓친 발화가 있을 수 있으므로)
+    """
+    window = Config.VAD_WINDOW_SECONDS
+    if window and since_seconds:
+        if since_seconds > Config.VAD_MAX_WINDOW_SECONDS:
+            return True
+        window = max(window, since_seconds)
+
+    try:
+        if window:
+            data = webm_tail(data, int(Config.VAD_TAIL_BYTES * window / Config.VAD_WINDOW_SECONDS))
+        samples = decode_pcm(data, window)
+        ratio = speech_ratio(samples)
+    except Exception as e:
+        print(f"⚠️ 음성 감지 실패, 그대로 전사: {e}")
+        with _stats_lock:
+            vad_stats['errors'] += 1
+        return True
+
+    speech = ratio >= Config.VAD_MIN_SPEECH_RATIO
+    with _stats_lock:
+        vad_stats['checked'] += 1
+        if not speech:
+            vad_stats['skipped'] += 1
+    if not speech:
+        print(f"🔇 무음 청크 건너뜀 (음성 비율 {ratio:.2f})")
+    return speech
+
+
+def get_stats():
+    """음성 감지 통계 (건너뛴 비율 포함)"""
+    with _stats_lock:
+        checked = vad_stats['checked']
+        return {
+            **vad_stats,
+            'skip_ratio': round(vad_stats['skipped'] / checked, 3) if checked else 0.0
+        }
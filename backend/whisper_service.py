@@ -1,14 +1,19 @@
 # backend/whisper_service.py
-from openai import OpenAI
 from config import Config
+import openai_service
+import task_service
+import vad_service
+from transcript_index import TranscriptIndex
 import os
 import tempfile
 import subprocess
-import math
-
-client = OpenAI(api_key=Config.OPENAI_API_KEY)
+import csv
+import shutil
+import time
 
 MAX_SIZE_BYTES = 25 * 1024 * 1024  # 25MB
+INGEST_PEEK_BYTES = 64 * 1024  # 컨테이너 형식 확인용
+INGEST_READ_BYTES = 1024 * 1024
 
 
 def get_audio_duration(file_path):
@@ -24,10 +29,10 @@ def get_audio_duration(file_path):
         return 0
 
 
-def compress_audio(input_path, output_path, target_size_mb=24):
-    """오디오 압축 (ffmpeg 사용)"""
+def compress_audio(input_path, output_path, target_size_mb=24, duration=None):
+    """오디오 압축 (ffmpeg 사용, duration을 이미 알면 다시 조회하지 않음)"""
     try:
-        duration = get_audio_duration(input_path)
+        duration = duration or get_audio_duration(input_path)
         if duration <= 0:
             duration = 600  # 기본값 10분
         
@@ -52,91 +57,189 @@ def compress_audio(input_path, output_path, target_size_mb=24):
         return False
 
 
-def split_audio(input_path, chunk_duration=300):
-    """오디오를 청크로 분할 (5분 단위)"""
-    duration = get_audio_duration(input_path)
-    num_chunks = math.ceil(duration / chunk_duration)
-    
+def split_audio(input_path, chunk_duration=300, duration=None):
+    """오디오를 청크로 분할 (5분 단위) → [{'path', 'start', 'end'}]
+
+    segment muxer로 한 번만 읽어서 분할하고, 입력이 이미 16kHz 모노 mp3면 재인코딩 없이 복사.
+    청크 경계는 프레임 단위로 맞춰지므로 실제 시작/끝 시간은 segment 목록에서 읽음
+    """
+    pattern = f"{input_path}_chunk_%03d.mp3"
+    list_path = f"{input_path}_chunks.csv"
+
+    result = _run_segmenter(input_path, pattern, list_path, chunk_duration, copy=True)
+    if result.returncode != 0:
+        print(f"⚠️ 스트림 복사 분할 실패, 재인코딩으로 분할: {result.stderr[-200:]}")
+        result = _run_segmenter(input_path, pattern, list_path, chunk_duration, copy=False)
+
     chunks = []
-    for i in range(num_chunks):
-        start_time = i * chunk_duration
-        chunk_path = f"{input_path}_chunk_{i}.mp3"
-        
-        subprocess.run([
-            'ffmpeg', '-i', input_path,
-            '-ss', str(start_time),
-            '-t', str(chunk_duration),
-            '-acodec', 'libmp3lame',
-            '-b:a', '64k',
-            '-ar', '16000',
-            '-ac', '1',
-            '-y',
-            chunk_path
-        ], capture_output=True)
-        
-        if os.path.exists(chunk_path):
-            chunks.append(chunk_path)
-    
+    try:
+        if os.path.exists(list_path):
+            directory = os.path.dirname(input_path)
+            with open(list_path, newline='') as f:
+                for row in csv.reader(f):
+                    if len(row) < 3:
+                        continue
+                    path = os.path.join(directory, row[0])
+                    if os.path.exists(path):
+                        chunks.append({'path': path, 'start': float(row[1]), 'end': float(row[2])})
+    finally:
+        if os.path.exists(list_path):
+            os.unlink(list_path)
+
+    # 중간에 실패하면 뒷부분 청크가 빠지므로 만들어진 청크도 버리고 실패로 처리
+    if result.returncode != 0:
+        for chunk in chunks:
+            os.unlink(chunk['path'])
+        raise RuntimeError(f"오디오 분할 실패: {result.stderr[-200:]}")
+
+    # 마지막 청크 끝은 전체 길이로 보정 (이미 구한 길이가 있으면 재사용)
+    if chunks and duration:
+        chunks[-1]['end'] = max(chunks[-1]['end'], float(duration))
+
     return chunks
 
 
-def transcribe(audio_file):
-    """오디오 파일을 텍스트로 변환"""
+def _run_segmenter(input_path, pattern, list_path, chunk_duration, copy):
+    """ffmpeg segment muxer 실행"""
+    codec = ['-c:a', 'copy'] if copy else ['-acodec', 'libmp3lame', '-b:a', '64k', '-ar', '16000', '-ac', '1']
+    return subprocess.run([
+        'ffmpeg', '-i', input_path,
+        '-vn',
+        *codec,
+        '-f', 'segment',
+        '-segment_time', str(chunk_duration),
+        '-segment_list', list_path,
+        '-segment_list_type', 'csv',
+        '-reset_timestamps', '1',
+        '-y',
+        pattern
+    ], capture_output=True, text=True)
+
+
+def transcribe_chunks(chunks, on_progress=None):
+    """청크들을 전사 풀에서 동시에 전사 → (텍스트 목록, 타임스탬프, 실패 청크)
+
+    chunks: split_audio 결과 [{'path', 'start', 'end'}]
+    """
+    futures = [_submit_chunk(chunk) for chunk in chunks]
+    return collect_chunk_results(chunks, futures, on_progress)
+
+
+def _submit_chunk(chunk):
+    return task_service.submit(_transcribe_chunk, chunk['path'], chunk['start'], pool='transcription')
+
+
+def collect_chunk_results(chunks, futures, on_progress=None):
+    """청크 전사 결과를 순서대로 합침 (재시도 후에도 실패한 청크는 건너뛰고 구간을 보고)
+
+    on_progress(완료 청크 수, 전체 청크 수, 지금까지의 텍스트)를 청크마다 호출
+    """
+    all_text = []
+    all_timestamps = []
+    failed_chunks = []
+    for i, (future, chunk) in enumerate(zip(futures, chunks)):
+        try:
+            text, timestamps = future.result()
+            all_text.append(text)
+            all_timestamps.extend(timestamps)
+        except Exception as e:
+            print(f"❌ 청크 {i} 전사 실패: {e}")
+            failed_chunks.append({
+                'index': i,
+                'start': chunk['start'],
+                'end': chunk['end'],
+                'error': str(e)
+            })
+        finally:
+            if os.path.exists(chunk['path']):
+                os.unlink(chunk['path'])
+
+        if on_progress:
+            on_progress(i + 1, len(chunks), ' '.join(all_text))
+
+    if chunks and len(failed_chunks) == len(chunks):
+        raise RuntimeError("모든 청크 전사에 실패했습니다")
+    return all_text, all_timestamps, failed_chunks
+
+
+def _transcribe_chunk(chunk_path, offset):
+    """청크 하나 전사 → (텍스트, 오프셋 적용된 타임스탬프)
+
+    일시적 오류(타임아웃, 429, 5xx)는 openai_service에서 재시도하므로 여기서는 다시 시도하지 않음
+    """
+    with open(chunk_path, "rb") as audio:
+        # ★ verbose_json으로 timestamp 포함 요청
+        response = openai_service.transcribe(
+            model="whisper-1",
+            file=audio,
+            language="ko",
+            response_format="verbose_json"
+        )
+
+    # 각 세그먼트의 timestamp에 오프셋 추가
+    timestamps = [
+        {'start': seg.start + offset, 'end': seg.end + offset, 'text': seg.text}
+        for seg in getattr(response, 'segments', None) or []
+    ]
+    return response.text, timestamps
+
+
+def transcribe(audio_file, timings=None, final=False, since_seconds=None):
+    """오디오 파일을 텍스트로 변환 (임시 파일 없이 메모리에서 처리)
+
+    Whisper가 받는 형식(webm/opus 등)은 그대로 전송하고, 그 외 형식만 ffmpeg 파이프로 mp3 변환.
+    timings에 dict를 넘기면 단계별 소요 시간(ms)과 음성 감지로 건너뛰었는지(vad_skipped)를 기록.
+    final(녹음 종료 후 마지막 전사)이면 음성 감지 없이 항상 전사, since_seconds는 vad_service.has_speech 참고
+    """
+    timings = {} if timings is None else timings
     try:
-        # 1. webm으로 임시 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_audio:
-            audio_file.save(temp_audio.name)
-            webm_path = temp_audio.name
-        
-        file_size = os.path.getsize(webm_path)
-        print(f"📁 webm 파일 크기: {file_size} bytes")
-        
-        if file_size < 1000:
-            os.unlink(webm_path)
+        started_at = time.perf_counter()
+
+        # 1. 요청 본문을 메모리로 읽기
+        data = audio_file.read()
+        timings['read_ms'] = _elapsed_ms(started_at)
+        print(f"📁 오디오 크기: {len(data)} bytes")
+
+        if len(data) < 1000:
             print("❌ 파일 너무 작음")
             return ""
-        
-        # 2. ffmpeg로 mp3 변환
-        mp3_path = webm_path.replace('.webm', '.mp3')
-        result = subprocess.run([
-            'ffmpeg', '-i', webm_path,
-            '-acodec', 'libmp3lame',
-            '-b:a', '64k',
-            '-ar', '16000',
-            '-ac', '1',
-            '-y',
-            mp3_path
-        ], capture_output=True, text=True)
-        
-        print(f"📁 ffmpeg 결과: {result.returncode}")
-        if result.stderr:
-            print(f"📁 ffmpeg stderr: {result.stderr[-200:]}")  # 마지막 200자만
-        
-        if result.returncode != 0 or not os.path.exists(mp3_path):
-            if os.path.exists(webm_path):
-                os.unlink(webm_path)
-            print("❌ ffmpeg 변환 실패")
-            return ""
-        
-        mp3_size = os.path.getsize(mp3_path)
-        print(f"📁 mp3 파일 크기: {mp3_size} bytes")
-        
-        # 3. Whisper API 호출
-        with open(mp3_path, "rb") as audio:
-            response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio,
-                language="ko",
-                response_format="text"
-            )
-        
-        print(f"✅ Whisper 응답: '{response}'")
-        
-        # 4. 임시 파일 정리
-        for f in [webm_path, mp3_path]:
-            if os.path.exists(f):
-                os.unlink(f)
-        
+
+        # 무음/소음 청크는 Whisper 호출 없이 빈 결과
+        if Config.VAD_ENABLED and not final:
+            stage_started = time.perf_counter()
+            speech = vad_service.has_speech(data, since_seconds)
+            timings['vad_ms'] = _elapsed_ms(stage_started)
+            if not speech:
+                timings['vad_skipped'] = True
+                return ""
+
+        # 2. 필요한 경우에만 ffmpeg 파이프로 mp3 변환
+        filename, content_type = _upload_name(audio_file)
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if Config.WHISPER_SKIP_TRANSCODE and extension in Config.WHISPER_PASSTHROUGH_FORMATS:
+            timings['transcode_ms'] = 0
+        else:
+            stage_started = time.perf_counter()
+            data = transcode_to_mp3(data)
+            timings['transcode_ms'] = _elapsed_ms(stage_started)
+            if not data:
+                print("❌ ffmpeg 변환 실패")
+                return ""
+            filename, content_type = 'audio.mp3', 'audio/mpeg'
+            print(f"📁 mp3 크기: {len(data)} bytes")
+
+        # 3. Whisper API 호출 (버퍼 그대로 업로드)
+        stage_started = time.perf_counter()
+        response = openai_service.transcribe(
+            model="whisper-1",
+            file=(filename, data, content_type),
+            language="ko",
+            response_format="text"
+        )
+        timings['whisper_ms'] = _elapsed_ms(stage_started)
+        timings['total_ms'] = _elapsed_ms(started_at)
+
+        print(f"✅ Whisper 응답: '{response}' ({timings})")
         return response
     
     except Exception as e:
@@ -144,23 +247,63 @@ def transcribe(audio_file):
         return ""
 
 
+def transcode_to_mp3(data):
+    """오디오 바이트 → 16kHz 모노 mp3 바이트 (stdin/stdout 파이프, 실패 시 None)"""
+    result = subprocess.run([
+        'ffmpeg', '-i', 'pipe:0',
+        '-vn',
+        '-acodec', 'libmp3lame',
+        '-b:a', '64k',
+        '-ar', '16000',
+        '-ac', '1',
+        '-f', 'mp3',
+        'pipe:1'
+    ], input=data, capture_output=True)
+
+    if result.returncode != 0 or not result.stdout:
+        print(f"📁 ffmpeg stderr: {result.stderr[-200:].decode('utf-8', 'replace')}")  # 마지막 200자만
+        return None
+    return result.stdout
+
+
+def _upload_name(audio_file):
+    """업로드 파일명/콘텐츠 타입 (확장자가 없으면 webm으로 간주)"""
+    filename = getattr(audio_file, 'filename', None) or 'audio.webm'
+    if '.' not in filename:
+        filename += '.webm'
+    content_type = (getattr(audio_file, 'mimetype', None) or 'audio/webm').split(';')[0]
+    return filename, content_type
+
+
+def _elapsed_ms(started_at):
+    return round((time.perf_counter() - started_at) * 1000, 1)
+
+
 def extract_and_transcribe(video_file):
     """비디오에서 오디오 추출 후 텍스트 변환 + duration + timestamps 추출"""
+    # 비디오를 임시 파일로 저장
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+        video_file.save(temp_video.name)
+        temp_video_path = temp_video.name
+
+    try:
+        return extract_and_transcribe_file(temp_video_path)
+    finally:
+        if os.path.exists(temp_video_path):
+            os.unlink(temp_video_path)
+
+
+def extract_and_transcribe_file(video_path, on_progress=None):
+    """디스크의 비디오 파일에서 오디오 추출 후 전사 (on_progress는 collect_chunk_results 참고)"""
+    audio_path = video_path + '_audio.mp3'
     try:
-        # 비디오를 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
-            video_file.save(temp_video.name)
-            temp_video_path = temp_video.name
-        
         # 1. 비디오 길이 추출
-        duration = int(get_audio_duration(temp_video_path))
+        duration = int(get_audio_duration(video_path))
         print(f"📏 비디오 길이: {duration}초")
         
         # 오디오 추출 + 압축
-        audio_path = temp_video_path + '_audio.mp3'
-        
         subprocess.run([
-            'ffmpeg', '-i', temp_video_path,
+            'ffmpeg', '-i', video_path,
             '-vn',
             '-acodec', 'libmp3lame',
             '-b:a', '64k',
@@ -175,40 +318,20 @@ def extract_and_transcribe(video_file):
         
         all_text = []
         all_timestamps = []
-        chunk_offset = 0  # 청크 시작 시간 오프셋
+        failed_chunks = []  # 재시도 후에도 실패한 청크 구간
         
         if file_size > MAX_SIZE_BYTES:
-            # 청크로 분할
-            chunk_duration = 300  # 5분
-            chunks = split_audio(audio_path, chunk_duration)
-            
-            for i, chunk_path in enumerate(chunks):
-                with open(chunk_path, "rb") as audio:
-                    # ★ verbose_json으로 timestamp 포함 요청
-                    response = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio,
-                        language="ko",
-                        response_format="verbose_json"
-                    )
-                    
-                    all_text.append(response.text)
-                    
-                    # 각 세그먼트의 timestamp에 오프셋 추가
-                    if hasattr(response, 'segments'):
-                        for seg in response.segments:
-                            all_timestamps.append({
-                                'start': seg.start + chunk_offset,
-                                'end': seg.end + chunk_offset,     
-                                'text': seg.text                    
-                            })
-                
-                chunk_offset += chunk_duration
-                os.unlink(chunk_path)
+            # 청크로 분할 후 병렬 전사
+            chunks = split_audio(audio_path, chunk_duration=300, duration=duration)  # 5분
+            if on_progress:
+                on_progress(0, len(chunks), '')
+            all_text, all_timestamps, failed_chunks = transcribe_chunks(chunks, on_progress)
         else:
+            if on_progress:
+                on_progress(0, 1, '')
             with open(audio_path, "rb") as audio:
                 # ★ verbose_json으로 timestamp 포함 요청
-                response = client.audio.transcriptions.create(
+                response = openai_service.transcribe(
                     model="whisper-1",
                     file=audio,
                     response_format="verbose_json"
@@ -223,25 +346,179 @@ def extract_and_transcribe(video_file):
                             'end': seg.end,
                             'text': seg.text
                         })
-        
-        # 정리
-        for f in [temp_video_path, audio_path]:
-            if os.path.exists(f):
-                os.unlink(f)
+
+            if on_progress:
+                on_progress(1, 1, response.text)
         
         print(f"✅ Transcript 추출 완료: {len(all_timestamps)}개 세그먼트")
-        
-        # ★ timestamps도 함께 반환
-        return {
-            'transcript': ' '.join(all_text),
-            'duration': duration,
-            'timestamps': all_timestamps  # ★ 새로 추가
-        }
+        return _extract_result(all_text, all_timestamps, duration, failed_chunks)
     
     except Exception as e:
         print(f"❌ 비디오 처리 실패: {e}")
         raise e
 
+    finally:
+        # 정리
+        if os.path.exists(audio_path):
+            os.unlink(audio_path)
+
+
+def _extract_result(all_text, all_timestamps, duration, failed_chunks):
+    # ★ timestamps도 함께 반환
+    return {
+        'transcript': ' '.join(all_text),
+        'duration': duration,
+        'timestamps': TranscriptIndex(all_timestamps),  # ★ 열 단위 압축 저장 (API 응답 시 to_list())
+        'failed_chunks': failed_chunks
+    }
+
+
+def extract_and_transcribe_stream(stream, chunk_duration=300):
+    """업로드 본문을 받는 동안 오디오 청크를 만들어 완성된 청크부터 전사
+
+    stream: 읽기 가능한 업로드 본문 (request.stream). 비디오 전체를 디스크에 저장하지 않지만,
+    moov가 뒤에 있는 MP4처럼 파이프로 읽을 수 없는 형식은 임시 파일로 받은 뒤 기존 경로로 처리
+    """
+    head = read_exactly(stream, INGEST_PEEK_BYTES)
+    if needs_seekable_input(head):
+        print("📦 파이프 입력 불가 형식 - 임시 파일로 받은 뒤 처리")
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_video:
+            temp_video.write(head)
+            shutil.copyfileobj(stream, temp_video, INGEST_READ_BYTES)
+            temp_video_path = temp_video.name
+        try:
+            return extract_and_transcribe_file(temp_video_path)
+        finally:
+            os.unlink(temp_video_path)
+
+    ingest = StreamingIngest(chunk_duration)
+    try:
+        ingest.feed(head)
+        while True:
+            data = stream.read(INGEST_READ_BYTES)
+            if not data:
+                break
+            ingest.feed(data)
+        return ingest.finish()
+    finally:
+        ingest.close()
+
+
+def read_exactly(stream, size):
+    """size 바이트까지 읽기 (스트림은 짧게 끊어서 반환할 수 있음)"""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b''.join(parts)
+
+
+def needs_seekable_input(head):
+    """MP4/MOV에서 moov가 mdat 뒤에 있으면 파이프로 디코딩 불가 (앞부분 박스만 확인)"""
+    if head[4:8] != b'ftyp':
+        return False
+
+    position = 0
+    while position + 8 <= len(head):
+        size = int.from_bytes(head[position:position + 4], 'big')
+        box = head[position + 4:position + 8]
+        if box == b'moov':
+            return False
+        if box == b'mdat':
+            return True
+        if size == 1 and position + 16 <= len(head):
+            size = int.from_bytes(head[position + 8:position + 16], 'big')
+        if size < 8:
+            break
+        position += size
+    # 확인 범위 안에서 moov를 못 찾으면 안전하게 파일로 처리
+    return True
+
+
+class StreamingIngest:
+    """업로드 바이트를 ffmpeg stdin으로 흘려 16kHz 모노 mp3 청크를 만들고,
+    segment 목록에 청크가 완성될 때마다 바로 전사 풀에 제출"""
+
+    def __init__(self, chunk_duration=300):
+        self.workdir = tempfile.mkdtemp(prefix='biskit-ingest-')
+        self.list_path = os.path.join(self.workdir, 'chunks.csv')
+        self.received_bytes = 0
+        self.chunks = []
+        self.futures = []
+        self._log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen([
+            'ffmpeg', '-i', 'pipe:0',
+            '-vn',
+            '-acodec', 'libmp3lame',
+            '-b:a', '64k',
+            '-ar', '16000',
+            '-ac', '1',
+            '-f', 'segment',
+            '-segment_time', str(chunk_duration),
+            '-segment_list', self.list_path,
+            '-segment_list_type', 'csv',
+            '-reset_timestamps', '1',
+            '-y',
+            os.path.join(self.workdir, 'chunk_%03d.mp3')
+        ], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log)
+
+    def feed(self, data):
+        """업로드 데이터 전달 (ffmpeg가 느리면 파이프가 차서 자연스럽게 대기)"""
+        try:
+            self.process.stdin.write(data)
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg 입력 처리 실패: {self._stderr()}")
+        self.received_bytes += len(data)
+        self._submit_ready()
+
+    def finish(self):
+        """입력 종료 후 남은 청크 전사까지 기다려 결과 반환"""
+        self.process.stdin.close()
+        returncode = self.process.wait()
+        self._submit_ready()
+        # 중간에 실패하면 일부 청크만 있어도 잘린 결과가 되므로 실패로 처리
+        if returncode != 0:
+            raise RuntimeError(f"오디오 추출 실패 (청크 {len(self.chunks)}개 생성 후): {self._stderr()}")
+
+        all_text, all_timestamps, failed_chunks = collect_chunk_results(self.chunks, self.futures)
+        duration = int(self.chunks[-1]['end']) if self.chunks else 0
+        print(f"✅ 스트리밍 Transcript 추출 완료: 청크 {len(self.chunks)}개, {len(all_timestamps)}개 세그먼트")
+        return _extract_result(all_text, all_timestamps, duration, failed_chunks)
+
+    def _submit_ready(self):
+        """segment 목록에 새로 기록된(완성된) 청크 제출"""
+        if not os.path.exists(self.list_path):
+            return
+        with open(self.list_path, newline='') as f:
+            content = f.read()
+        # 아직 쓰는 중인 마지막 줄은 제외
+        lines = content.split('\n')[:-1]
+        for row in csv.reader(lines[len(self.chunks):]):
+            if len(row) < 3:
+                continue
+            chunk = {'path': os.path.join(self.workdir, row[0]), 'start': float(row[1]), 'end': float(row[2])}
+            self.chunks.append(chunk)
+            self.futures.append(_submit_chunk(chunk))
+            print(f"🎧 청크 {len(self.chunks)} 전사 시작 ({chunk['start']:.0f}초~, 업로드 {self.received_bytes // (1024 * 1024)}MB)")
+
+    def _stderr(self):
+        self._log.seek(0)
+        return self._log.read()[-200:].decode('utf-8', 'replace')
+
+    def close(self):
+        """프로세스/임시 디렉터리 정리"""
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        for future in self.futures:
+            future.cancel()
+        self._log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
 
 def transcribe_stream(audio_chunks):
     """실시간 스트리밍 전사 (청크 단위)"""
@@ -254,7 +531,7 @@ def transcribe_stream(audio_chunks):
                 temp_path = temp.name
             
             with open(temp_path, "rb") as audio:
-                response = client.audio.transcriptions.create(
+                response = openai_service.transcribe(
                     model="whisper-1",
                     file=audio,
                     response_format="text"
@@ -1,12 +1,80 @@
 # backend/youtube_service.py
-from googleapiclient.discovery import build
 import isodate
 from youtube_transcript_api import YouTubeTranscriptApi
 from config import Config
+import cache_service
+import task_service
+import transcript_index
+from transcript_index import TranscriptIndex
+import threading
+import time
 import re
 
 YOUTUBEDATA_API_KEY = Config.YOUTUBEDATA_API_KEY
-youtube = build('youtube', 'v3', developerKey=YOUTUBEDATA_API_KEY)
+
+# Data API 클라이언트는 첫 사용 시 생성 (import 시 discovery/네트워크 작업 없음)
+_youtube = None
+_youtube_lock = threading.Lock()
+_http_local = threading.local()
+client_build_ms = None
+
+
+def get_youtube_client():
+    """YouTube Data API 클라이언트 (번들된 정적 discovery 문서로 1회 생성 후 공유)"""
+    global _youtube, client_build_ms
+    if _youtube is None:
+        with _youtube_lock:
+            if _youtube is None:
+                started_at = time.perf_counter()
+                from googleapiclient.discovery import build
+                _youtube = build(
+                    'youtube', 'v3',
+                    developerKey=YOUTUBEDATA_API_KEY,
+                    static_discovery=True,
+                    cache_discovery=False
+                )
+                client_build_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                print(f"🔧 YouTube 클라이언트 생성: {client_build_ms}ms")
+    return _youtube
+
+
+def _get_http():
+    """스레드별 HTTP 연결 (httplib2는 스레드 안전하지 않으므로 스레드마다 keep-alive 연결 재사용)"""
+    http = getattr(_http_local, 'http', None)
+    if http is None:
+        import httplib2
+        http = httplib2.Http(timeout=Config.VIDEO_INFO_TIMEOUT)
+        _http_local.http = http
+    return http
+
+
+def _encode_transcript(transcript):
+    """캐시 디스크 저장용 (TranscriptIndex → 기존 JSON 형태)"""
+    return {**transcript, 'timestamps': transcript['timestamps'].to_list()}
+
+
+def _decode_transcript(data):
+    return {**data, 'timestamps': TranscriptIndex(data['timestamps'])}
+
+
+# video_id 기준 캐시 (같은 영상을 여러 학생이 로드해도 업스트림 호출은 1회)
+transcript_cache = cache_service.get_cache(
+    'youtube_transcript',
+    ttl=Config.TRANSCRIPT_CACHE_TTL,
+    memory_items=Config.TRANSCRIPT_CACHE_MEMORY_ITEMS,
+    memory_bytes=Config.TRANSCRIPT_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_bytes=Config.TRANSCRIPT_CACHE_DISK_MB * 1024 * 1024,
+    encode=_encode_transcript,
+    decode=_decode_transcript
+)
+video_info_cache = cache_service.get_cache(
+    'youtube_video_info',
+    ttl=Config.VIDEO_INFO_CACHE_TTL,
+    memory_items=Config.TRANSCRIPT_CACHE_MEMORY_ITEMS * 4
+)
+
+# 같은 영상 동시 로드는 한 번만 실행
+load_flight = task_service.get_single_flight('youtube_load')
 
 
 def extract_video_id(url):
@@ -24,6 +92,11 @@ def extract_video_id(url):
 
 def get_transcript_from_youtube(video_id):
     """YouTube 자막 가져오기 - 타임스탬프 포함"""
+    cached = transcript_cache.get(video_id)
+    if cached is not None:
+        print(f"⚡ 자막 캐시 사용: {video_id}")
+        return cached
+
     try:
         print(f"📝 YouTube 자막 시도: {video_id}")
         ytt_api = YouTubeTranscriptApi()
@@ -43,21 +116,20 @@ def get_transcript_from_youtube(video_id):
         fetched = transcript.fetch()
         transcript_data = fetched.to_raw_data()
         
-        # 전체 텍스트
-        full_text = ' '.join([item['text'] for item in transcript_data])
-        
-        # 타임스탬프 데이터 (퀴즈용)
-        timestamps = [{
+        # 타임스탬프 데이터 (퀴즈용, 열 단위 압축 저장)
+        timestamps = TranscriptIndex({
             'start': item['start'],
             'end': item['start'] + item.get('duration', 0),
             'text': item['text']
-        } for item in transcript_data]
+        } for item in transcript_data)
         
-        return {
-            'text': full_text,
+        result = {
+            'text': timestamps.text,  # 전체 텍스트 (세그먼트를 공백으로 연결)
             'timestamps': timestamps,
             'source': 'youtube'
         }
+        transcript_cache.set(video_id, result)
+        return result
         
     except Exception as e:
         print(f"❌ YouTube 자막 실패: {e}")
@@ -65,29 +137,25 @@ def get_transcript_from_youtube(video_id):
 
 
 def get_transcript_until_time(timestamps, current_time):
-    """timestamps 기반으로 현재 시간까지의 텍스트만 추출"""
+    """timestamps(또는 TranscriptIndex) 기반으로 현재 시간까지의 텍스트만 추출"""
     if not timestamps:
         return ""
-    
-    texts = []
-    for seg in timestamps:
-        if seg['end'] <= current_time:
-            texts.append(seg['text'])
-        elif seg['start'] < current_time:
-            # 중간에 걸친 세그먼트도 포함
-            texts.append(seg['text'])
-            break
-    
-    return ' '.join(texts)
+
+    index = timestamps if isinstance(timestamps, TranscriptIndex) else transcript_index.get_index(timestamps)
+    return index.text_until(current_time)
 
 
 def get_video_info(video_id):
     """영상 정보 가져오기 (제목, 길이)"""
+    cached = video_info_cache.get(video_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = youtube.videos().list(
+        response = get_youtube_client().videos().list(
             part="snippet,contentDetails",
             id=video_id
-        ).execute()
+        ).execute(http=_get_http())
 
         if not response["items"]:
             raise Exception("영상 정보를 찾을 수 없습니다.")
@@ -98,23 +166,48 @@ def get_video_info(video_id):
         title = item["snippet"]["title"]
         thumbnail = item["snippet"]["thumbnails"]["high"]["url"]
 
-        return {
+        video_info = {
             "video_id": video_id,
             "title": title,
             "duration": duration_seconds,
             "thumbnail": thumbnail
         }
+        # 실패 시 기본값은 캐시하지 않음
+        video_info_cache.set(video_id, video_info)
+        return video_info
 
     except Exception as e:
         print(f"❌ 영상 정보 추출 실패: {e}")
-        return {"video_id": video_id, "duration": 600, "title": "", "thumbnail": ""}
+        return default_video_info(video_id)
+
+
+def default_video_info(video_id):
+    """영상 정보 조회 실패 시 기본값"""
+    return {"video_id": video_id, "duration": 600, "title": "", "thumbnail": ""}
 
 
 def get_transcript(video_url):
-    """자막 추출 메인 함수"""
+    """자막 추출 메인 함수 (같은 영상의 동시 로드는 한 번만 조회해 결과 공유)"""
     video_id = extract_video_id(video_url)
-    transcript = get_transcript_from_youtube(video_id)
-    video_info = get_video_info(video_id)
+    return load_flight.do(video_id, _load_video, video_id)
+
+
+def _load_video(video_id):
+    """자막/영상 정보 동시 조회"""
+    started_at = time.perf_counter()
+    transcript_future = task_service.submit(get_transcript_from_youtube, video_id)
+    info_future = task_service.submit(get_video_info, video_id)
+
+    transcript = task_service.wait_result(
+        transcript_future, Config.TRANSCRIPT_FETCH_TIMEOUT, label='자막 조회'
+    )
+    # 영상 정보가 늦으면 자막을 기다리게 하지 않고 기본값으로 대체
+    video_info = task_service.wait_result(
+        info_future,
+        task_service.remaining(started_at, Config.VIDEO_INFO_TIMEOUT),
+        default=default_video_info(video_id),
+        label='영상 정보 조회'
+    )
     
     return {
         'video_id': video_id,
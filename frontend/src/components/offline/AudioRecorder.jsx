@@ -15,18 +15,24 @@ function AudioRecorder({ onTranscriptUpdate }) {
   const streamRef = useRef(null);
   const isProcessingRef = useRef(false);
   const lastTranscriptRef = useRef('');  // 이전 전사 결과 추적
+  const recordStartRef = useRef(0);  // 녹음 시작 시각 (ms)
+  const transcribedUntilRef = useRef(0);  // 마지막으로 전사된 녹음 위치 (초)
 
-  const sendChunkForTranscription = useCallback(async (audioBlob) => {
+  const sendChunkForTranscription = useCallback(async (audioBlob, isFinal = false) => {
     if (audioBlob.size < 1000) return;
     
     isProcessingRef.current = true;
     setIsProcessing(true);
     
     try {
+      // 마지막 전사 이후 추가된 구간 길이 (서버 음성 감지가 이 구간 전체를 검사)
+      const recordedSeconds = (Date.now() - recordStartRef.current) / 1000;
       const formData = new FormData();
       formData.append('audio', audioBlob, 'chunk.webm');
       formData.append('user_id', userId);
       formData.append('language', language);
+      formData.append('since_seconds', String(recordedSeconds - transcribedUntilRef.current));
+      formData.append('final', isFinal ? 'true' : 'false');
 
       const response = await fetch(API_ENDPOINTS.WHISPER_TRANSCRIBE, {
         method: 'POST',
@@ -34,6 +40,9 @@ function AudioRecorder({ onTranscriptUpdate }) {
       });
 
       const data = await response.json();
+      if (data.success && !data.skipped) {
+        transcribedUntilRef.current = recordedSeconds;
+      }
       
       if (data.success && data.transcript && data.transcript.trim()) {
         const fullText = data.transcript.trim();
@@ -74,6 +83,8 @@ function AudioRecorder({ onTranscriptUpdate }) {
       mediaRecorderRef.current = mediaRecorder;
       chunksRef.current = [];
       lastTranscriptRef.current = '';
+      recordStartRef.current = Date.now();
+      transcribedUntilRef.current = 0;
 
       mediaRecorder.ondataavailable = (e) => {
         if (e.data.size > 0) {
@@ -118,10 +129,10 @@ function AudioRecorder({ onTranscriptUpdate }) {
 
     setIsRecording(false);
 
-    // 최종 전사
+    // 최종 전사 (음성 감지 없이 항상 전사)
     if (chunksRef.current.length > 0) {
       const blob = new Blob(chunksRef.current, { type: 'audio/webm' });
-      await sendChunkForTranscription(blob);
+      await sendChunkForTranscription(blob, true);
     }
 
     console.log('⏹ 녹음 종료');
@@ -10,15 +10,19 @@ export const API_ENDPOINTS = {
   
   // Quiz
   QUIZ_GENERATE: `${API_BASE_URL}/api/quiz/generate`,
+  QUIZ_GENERATE_STREAM: `${API_BASE_URL}/api/quiz/generate/stream`,
   QUIZ_SCHEDULE: `${API_BASE_URL}/api/quiz/schedule`,
+  QUIZ_BATCH: `${API_BASE_URL}/api/quiz/batch`,
   QUIZ_SUBMIT: `${API_BASE_URL}/api/quiz/submit`,
   
   // Chat
   CHAT: `${API_BASE_URL}/api/chat`,
+  CHAT_STREAM: `${API_BASE_URL}/api/chat/stream`,
   
   // Whisper / Upload
   WHISPER_TRANSCRIBE: `${API_BASE_URL}/api/whisper/transcribe`,
   WHISPER_EXTRACT: `${API_BASE_URL}/api/whisper/extract`,
+  WHISPER_JOBS: `${API_BASE_URL}/api/whisper/jobs`,
   UPLOAD_SESSION: `${API_BASE_URL}/api/upload/session`,
   
   // Offline
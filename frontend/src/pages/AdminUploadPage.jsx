@@ -95,11 +95,13 @@ function AdminUploadPage() {
     setExtractingTranscript(true);
     setStatus('Whisper AI로 텍스트 추출 중');
     try {
-      const formData = new FormData();
-      formData.append('video', file);
-      formData.append('user_id', userId);
-
-      const res = await fetch(API_ENDPOINTS.WHISPER_EXTRACT, { method: 'POST', body: formData });
+      // 파일을 본문으로 바로 전송 → 서버가 업로드를 받는 동안 전사 시작
+      const params = new URLSearchParams({ user_id: userId, filename: file.name });
+      const res = await fetch(`${API_ENDPOINTS.WHISPER_EXTRACT}?${params}`, {
+        method: 'POST',
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file
+      });
       const data = await res.json();
       
       if (data.success) {
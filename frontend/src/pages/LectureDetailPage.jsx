@@ -184,7 +184,8 @@ function LectureDetailPage() {
               current_time: time, 
               num_quizzes: 1,
               transcript: lecture.transcript,
-              timestamps: lecture.timestamps
+              timestamps: lecture.timestamps,
+              duration: videoRef.current.duration
             })
           });
           const data = await res.json();
@@ -58,15 +58,14 @@ function UploadLearnPage() {
     setProgress('비디오에서 음성을 추출하는 중...');
 
     try {
-      const formData = new FormData();
-      formData.append('video', file);
-      formData.append('user_id', userId);
-
       setProgress('Whisper AI로 텍스트 변환 중... (대용량 파일은 시간이 걸릴 수 있습니다)');
 
-      const response = await fetch(API_ENDPOINTS.WHISPER_EXTRACT, {
+      // 파일을 본문으로 바로 전송 → 서버가 업로드를 받는 동안 전사 시작
+      const params = new URLSearchParams({ user_id: userId, filename: file.name });
+      const response = await fetch(`${API_ENDPOINTS.WHISPER_EXTRACT}?${params}`, {
         method: 'POST',
-        body: formData
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file
       });
 
       const data = await response.json();